@@ -1,12 +1,14 @@
-from dataclasses import dataclass
-from functools import cached_property
+from dataclasses import dataclass, field
 
-from pykyll.html import slugify, make_description
 from sessionmodel.Speaker import Speaker
-from pykyll.markdown import render_markdown
+from sessionmodel.render_cache import render_markdown_cached
+from sessionmodel.slug_registry import slugify_cached
 
+# pykyll.html's make_description, imported on first use
+_make_description = None
 
-@dataclass
+
+@dataclass(slots=True)
 class Session:
     id: str
     title: str
@@ -26,6 +28,17 @@ class Session:
     _scheduled: bool = False
     sponsor: str | None = None
 
+    # Explicit cache, as cached_property needs an instance __dict__
+    _short_abstract_html: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def scheduled(self) -> bool:
+        return self._scheduled
+
+    @scheduled.setter
+    def scheduled(self, value: bool):
+        self._scheduled = value
+
     @property
     def is_workshop(self) -> bool:
         return self.type == "workshop"
@@ -45,7 +58,7 @@ class Session:
 
     @property
     def title_as_html(self) -> str:
-        return render_markdown(
+        return render_markdown_cached(
             self.title,
             clean=True,
             strip_outer_p_tag=True,
@@ -71,17 +84,22 @@ class Session:
         if self.slug:
             return self.slug
         else:
-            return slugify(self.title)
+            return slugify_cached(self.title)
 
     @property
     def abstract_as_html(self) -> str:
-        return render_markdown(self.abstract, linkify=True, clean=True, strip_outer_p_tag=True)
+        return render_markdown_cached(self.abstract, linkify=True, clean=True, strip_outer_p_tag=True)
 
     @property
     def outline_as_html(self) -> str:
-        return render_markdown(self.outline, linkify=True, clean=True, strip_outer_p_tag=True)
+        return render_markdown_cached(self.outline, linkify=True, clean=True, strip_outer_p_tag=True)
 
-    @cached_property
+    @property
     def short_abstract_as_html(self) -> str:
-        html = render_markdown(self.abstract, linkify=True, clean=True, strip_outer_p_tag=True)
-        return make_description(html)
+        if self._short_abstract_html is None:
+            global _make_description
+            if _make_description is None:
+                from pykyll.html import make_description as _make_description
+            html = render_markdown_cached(self.abstract, linkify=True, clean=True, strip_outer_p_tag=True)
+            self._short_abstract_html = _make_description(html)
+        return self._short_abstract_html
@@ -1,70 +1,137 @@
-import codecs
-from dataclasses import asdict
+import threading
+from collections.abc import Mapping
+from typing import Iterable, Iterator
 
-import yaml
-
-from .logging import log_warn
-from objectipy.objectipy import dict_to_object
+from .logging import WarningCounts, aggregated_warnings, log_warn_aggregated
+from sessionmodel.instrumentation import count, timed
 from sessionmodel.Link import Link
 from sessionmodel.Session import Session
 from sessionmodel.Speaker import Speaker
+from sessionmodel.serialization import to_data, write_json, write_msgpack
+from sessionmodel.yaml_io import read_yaml, write_yaml, iter_yaml_sequence, write_yaml_sequence
+
+# objectipy's dict_to_object, imported on first use - only parsing needs it
+_dict_to_object = None
+
+
+def _session_to_dict(session: Session) -> dict:
+    return to_data(session)
 
 
 def _sessions_to_dict(sessions: [Session]) -> list:
-    def null_filter_factory(data: list):
-        return dict(x for x in data if x[1] is not None and not x[0].startswith("_"))
-    return [asdict(session, dict_factory=null_filter_factory) for session in sessions]
+    return [_session_to_dict(session) for session in sessions]
 
 
+@timed("yaml.load")
 def load_yaml(filename: str) -> dict:
     """
     Reads a YAML file into a dictionary
     """
-    with codecs.open(filename, 'r', "utf-8") as f:
-        return yaml.safe_load(f)
+    return read_yaml(filename)
 
 
-def save_yaml(filename: str, data: dict):
+def save_yaml(filename: str, data: dict, fast: bool = False):
     """
-    Writes a dictionary to a YAML file
+    Writes a dictionary to a YAML file (fast=True uses libyaml - see yaml_io.format_yaml)
     """
-    with codecs.open(filename, "w", "utf-8") as f:
-        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+    write_yaml(filename, data, fast)
 
 
-def save_sessions(filename: str, sessions: [Session]):
+def save_sessions(filename: str, sessions: [Session], fast: bool = False, format: str = "yaml"):
     """
-    Writes an array of sessions to a YAML file
+    Writes an array of sessions, sorted by id, to a YAML (or "json" or "msgpack") file
     """
     sessions = list(sessions)
     sessions.sort(key=lambda session: session.id)
-    data = _sessions_to_dict(sessions)
-    # with codecs.open(filename, "w", "utf-8") as f:
-    #     for session in sessions:
-    #         yaml.dump(data, f, default_flow_style=False, sort_keys=False)
-    save_yaml(filename, data)
+    write_sessions(filename, sessions, fast, format)
 
 
+@timed("write_sessions")
+def write_sessions(filename: str, sessions: Iterable[Session], fast: bool = False, format: str = "yaml"):
+    """
+    Writes sessions to a YAML (or "json" or "msgpack") file as they are produced (so, unlike save_sessions,
+    in the order given). fast only applies to YAML
+    """
+    match format:
+        case "yaml":
+            write_yaml_sequence(filename, (_session_to_dict(session) for session in sessions), fast)
+        case "json":
+            write_json(filename, sessions)
+        case "msgpack":
+            write_msgpack(filename, sessions)
+        case _:
+            raise Exception(f"Unknown session file format: {format}")
+
+
+def parse_session(session_data: dict, warnings: WarningCounts | None = None) -> Session:
+    """
+    Parses a session data dict into a Session object.
+    Warnings are aggregated into warnings, if given (see log_warn_aggregated)
+    """
+    global _dict_to_object
+    if _dict_to_object is None:
+        from objectipy.objectipy import dict_to_object as _dict_to_object
+    session = _dict_to_object(session_data, Session)
+
+    #!TBD: once dict_to_objects recurses objects we can remove the next bit:
+    speakers = []
+    for speaker_data in session.speakers:
+        if links_data := speaker_data.get("links"):
+            links = [_dict_to_object(link_data, Link) for link_data in links_data]
+            speaker_data["links"] = links
+        if "bio" not in speaker_data:
+            speaker_data["bio"] = "bio coming soon ..."
+            count("speakers.missing_bio")
+            name = speaker_data.get("name")
+            log_warn_aggregated("speakers without bio - defaulted", name, "*** No bio found for speaker %s - defaulting", name,
+                                counts=warnings)
+        speaker = _dict_to_object(speaker_data, Speaker)
+        speakers.append(speaker)
+    session.speakers = speakers
+    count("sessions")
+    count("speakers", len(speakers))
+    return session
+
+
+@timed("parse_sessions")
 def parse_sessions(sessions_data: [dict]) -> [Session]:
     """
     Parses an array of session data dicts into Session objects
     """
-    sessions = [dict_to_object(session_data, Session) for session_data in sessions_data]
+    with aggregated_warnings():
+        return [parse_session(session_data) for session_data in sessions_data]
 
-    #!TBD: once dict_to_objects recurses objects we can remove the next bit:
-    for session in sessions:
-        speakers = []
-        for speaker_data in session.speakers:
-            if links_data := speaker_data.get("links"):
-                links = [dict_to_object(link_data, Link) for link_data in links_data]
-                speaker_data["links"] = links
-            if "bio" not in speaker_data:
-                speaker_data["bio"] = "bio coming soon ..."
-                log_warn(f"*** No bio found for speaker {speaker_data.get('name')} - defaulting")
-            speaker = dict_to_object(speaker_data, Speaker)
-            speakers.append(speaker)
-        session.speakers = speakers
-    return sessions
+
+class LazySessions(Mapping):
+    """
+    A read-only mapping of session id to Session, where each session is only parsed from its
+    session data (as by parse_session) the first time it is looked up
+    """
+    def __init__(self, sessions_data_by_id: {str: dict}):
+        self._data = sessions_data_by_id
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, session_id: str) -> Session:
+        if (session := self._sessions.get(session_id)) is None:
+            with self._lock:
+                # parse_session updates the data in place, so it must only be parsed once
+                if (session := self._sessions.get(session_id)) is None:
+                    session = self._sessions[session_id] = parse_session(self._data[session_id])
+        return session
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def parsed_count(self) -> int:
+        return len(self._sessions)
 
 
 def load_sessions(filename: str) -> [Session]:
@@ -74,3 +141,17 @@ def load_sessions(filename: str) -> [Session]:
     data = load_yaml(filename)
     return parse_sessions(data)
 
+
+def iter_sessions(filename: str) -> Iterator[Session]:
+    """
+    Reads sessions from a YAML file one at a time, parsing each into a Session object as it is read.
+    Unlike load_sessions, only one session's data is held in memory at a time
+    """
+    # Counted locally rather than in an aggregated_warnings block, which would also swallow
+    # warnings logged elsewhere in this thread while the generator is suspended
+    warnings = WarningCounts()
+    try:
+        for session_data in iter_yaml_sequence(filename):
+            yield parse_session(session_data, warnings)
+    finally:
+        warnings.log_summary()
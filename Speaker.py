@@ -4,7 +4,7 @@ from sessionmodel.Colour import Colour
 from sessionmodel.Link import Link
 
 
-@dataclass
+@dataclass(slots=True)
 class Speaker:
     id: int
     name: str
@@ -0,0 +1,72 @@
+"""
+Measures how long importing sessionmodel modules takes, in fresh interpreters (using python -X importtime),
+and checks that modules only needed for rendering, parsing or multiprocessing are not imported up front.
+Exits with a non-zero status if a module is over its budget, or imports something it shouldn't.
+
+Run from the directory containing the sessionmodel package:
+    python -m sessionmodel.benchmarks.bench_import [--repeat 5] [--budget-scale 1.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Module -> budget, in milliseconds (the best cumulative import time over the runs).
+# These leave some headroom over typical times - scale them with --budget-scale on slower machines
+BUDGETS_MS = {
+    "sessionmodel.yaml_io": 50,
+    "sessionmodel.Sessions": 75,
+    "sessionmodel.schedule_model": 75,
+    "sessionmodel.schedule_builder": 100,
+}
+
+# Modules that importing any of the above should not load
+DEFERRED = ["pykyll.markdown", "pykyll.html", "objectipy", "sqlite3", "json", "concurrent.futures.process"]
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports the module in a new interpreter, returning the cumulative import time of every module
+    it loaded, in microseconds
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sessionmodel import time benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplies every budget, e.g. for slow machines")
+    args = parser.parse_args()
+
+    failures = []
+    for module, budget_ms in BUDGETS_MS.items():
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best_ms = min(run[module] for run in runs) / 1000
+        budget_ms *= args.budget_scale
+        deferred = [name for name in DEFERRED if name in runs[0]]
+        status = "ok" if best_ms <= budget_ms and not deferred else "FAIL"
+        print(f"{module:<32} {best_ms:8.1f} ms  (budget {budget_ms:.0f} ms)  {status}")
+        if best_ms > budget_ms:
+            failures.append(f"{module} took {best_ms:.1f} ms, over its {budget_ms:.0f} ms budget")
+        if deferred:
+            failures.append(f"{module} imports {', '.join(deferred)}")
+
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
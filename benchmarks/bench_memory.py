@@ -0,0 +1,79 @@
+"""
+Measures the memory held by loaded session data and schedules: bytes per session, overall,
+and the size of individual model objects (not including what they refer to).
+
+Run from the directory containing the sessionmodel package:
+    python -m sessionmodel.benchmarks.bench_memory [scale]
+"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from sessionmodel.benchmarks.run_benchmarks import SCALES, YEAR
+from sessionmodel.benchmarks.synthetic import generate_conference
+
+
+def retained_bytes(fn) -> tuple[int, object]:
+    """
+    Returns the memory still held by what fn returns, along with the result itself
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return current - before, result
+
+
+def object_size(obj) -> int:
+    """
+    The size of the object itself, plus its instance __dict__ if it has one
+    """
+    size = sys.getsizeof(obj)
+    if (instance_dict := getattr(obj, "__dict__", None)) is not None:
+        size += sys.getsizeof(instance_dict)
+    return size
+
+
+def main(scale: str = "large"):
+    from sessionmodel.schedule_builder import load_schedule, load_session_data
+
+    with tempfile.TemporaryDirectory() as data_root:
+        generate_conference(data_root, YEAR, SCALES[scale])
+        session_data_paths = [
+            os.path.join(data_root, path)
+            for path in ["fixed_session_data.yml", f"{YEAR}/session_data.yml", f"{YEAR}/session_data_overrides.yml"]]
+        schedule_path = os.path.join(data_root, YEAR, "schedule.yml")
+
+        data_bytes, session_data_by_id = retained_bytes(lambda: load_session_data(session_data_paths))
+        schedule_bytes, schedule = retained_bytes(lambda: load_schedule(schedule_path, session_data_paths))
+
+    session_count = len(session_data_by_id)
+    print(f"{scale}: {session_count} sessions, {len(schedule.sessions_by_slug)} scheduled")
+    print(f"  session data  {data_bytes / 1024:10.0f} KB {data_bytes / session_count:10.0f} bytes/session")
+    print(f"  schedule      {schedule_bytes / 1024:10.0f} KB {schedule_bytes / len(schedule.sessions_by_slug):10.0f} bytes/session")
+
+    session = next(session for session in schedule.sessions_by_slug.values() if session.data.speakers)
+    day = schedule.days[-1]
+    timeslot = day.timeslots[0]
+    samples = {
+        "Session": session.data,
+        "Speaker": session.data.speakers[0],
+        "Link": session.data.speakers[0].links[0],
+        "schedule Session": session,
+        "SessionSlot": timeslot.session_slots[0],
+        "Timeslot": timeslot,
+        "Day": day,
+    }
+    for name, obj in samples.items():
+        print(f"  {name:<18} {object_size(obj):6} bytes")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
@@ -0,0 +1,59 @@
+"""
+Compares the pure-Python and libyaml YAML paths on a large session file.
+
+Run from the directory containing the sessionmodel package:
+    python -m sessionmodel.benchmarks.bench_yaml [session_count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+
+def best_of(repeat: int, fn) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(count: int = 5000, repeat: int = 3):
+    from sessionmodel.benchmarks.synthetic import make_session_data
+    from sessionmodel.yaml_io import SafeLoader, read_yaml, write_yaml
+
+    data = make_session_data(count)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "session_data.yml")
+        write_yaml(path, data)
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            content = f.read()
+
+        pure_text = yaml.dump(data, default_flow_style=False, sort_keys=False)
+        if pure_text.encode("utf-8") != content:
+            raise Exception("Output differs from the pure-Python emitter")
+        if yaml.load(content, Loader=yaml.SafeLoader) != read_yaml(path):
+            raise Exception("Parsed data differs from the pure-Python loader")
+        write_yaml(path, data, fast=True)
+        if read_yaml(path) != data:
+            raise Exception("Fast output does not round-trip")
+
+        print(f"{count} sessions, {size / 1024 / 1024:.1f} MB (libyaml {'available' if SafeLoader is not yaml.SafeLoader else 'NOT available'})")
+        results = [
+            ("load (pure Python)", best_of(repeat, lambda: yaml.load(content, Loader=yaml.SafeLoader))),
+            ("load (yaml_io)", best_of(repeat, lambda: read_yaml(path))),
+            ("dump (pure Python)", best_of(repeat, lambda: yaml.dump(data, default_flow_style=False, sort_keys=False))),
+            ("dump (yaml_io)", best_of(repeat, lambda: write_yaml(path, data))),
+            ("dump (yaml_io fast)", best_of(repeat, lambda: write_yaml(path, data, fast=True))),
+        ]
+        for name, seconds in results:
+            print(f"  {name:<20} {seconds * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
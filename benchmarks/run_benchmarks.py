@@ -0,0 +1,153 @@
+"""
+Times loading, building and saving schedules, and the HTML properties, on synthetic
+conferences of several sizes, along with the memory used by a load.
+
+Run from the directory containing the sessionmodel package:
+    python -m sessionmodel.benchmarks.run_benchmarks [--scales small,medium] [--repeat 3]
+        [--json results.json] [--compare baseline.json]
+
+--json writes the results, so a later run can be compared against them with --compare
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sessionmodel.benchmarks.synthetic import ConferenceSpec, generate_conference
+
+SCALES = {
+    "small": ConferenceSpec(days=1, rooms=3, timeslots_per_day=6),
+    "medium": ConferenceSpec(days=3, rooms=5, timeslots_per_day=8),
+    "large": ConferenceSpec(days=4, rooms=10, timeslots_per_day=10, speakers_per_session=2),
+    "huge": ConferenceSpec(days=5, rooms=20, timeslots_per_day=12, speakers_per_session=2, workshop_days=2),
+}
+
+YEAR = "2030"
+
+
+def best_of(repeat: int, fn, setup=None) -> float:
+    best = None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_memory(fn) -> dict:
+    """
+    Returns the peak memory allocated while fn runs, and the memory still held by what it returns
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {"peak_bytes": peak - before, "retained_bytes": current - before}
+
+
+def render_all(schedule):
+    for session in schedule.sessions_by_slug.values():
+        session.title_as_html
+        session.abstract_as_html
+        session.outline_as_html
+        for speaker in session.speakers:
+            speaker.bio_as_html
+
+
+def run_scale(spec: ConferenceSpec, repeat: int) -> dict:
+    from sessionmodel.Sessions import load_yaml, parse_sessions, save_sessions
+    from sessionmodel.render_cache import get_render_cache
+    from sessionmodel.schedule_builder import ScheduleBuilder, load_schedule, load_session_data, merge_session_layers
+
+    with tempfile.TemporaryDirectory() as data_root:
+        generate_conference(data_root, YEAR, spec)
+        session_data_paths = [
+            os.path.join(data_root, path)
+            for path in ["fixed_session_data.yml", f"{YEAR}/session_data.yml", f"{YEAR}/session_data_overrides.yml"]]
+        schedule_path = os.path.join(data_root, YEAR, "schedule.yml")
+
+        raw_layers = [load_yaml(path) for path in session_data_paths]
+        schedule_data = load_yaml(schedule_path)
+        session_data_by_id = load_session_data(session_data_paths)
+        schedule = load_schedule(schedule_path, session_data_paths)
+        save_path = os.path.join(data_root, "saved.yml")
+
+        def render_cold():
+            get_render_cache().clear()
+            render_all(schedule)
+
+        timings = {
+            "yaml_load": best_of(repeat, lambda: [load_yaml(path) for path in session_data_paths + [schedule_path]]),
+            "merge_layers": best_of(repeat, lambda layers: merge_session_layers(layers), lambda: copy.deepcopy(raw_layers)),
+            "parse_sessions": best_of(repeat, lambda data: parse_sessions(data.values()), lambda: merge_session_layers(copy.deepcopy(raw_layers))),
+            "load_session_data": best_of(repeat, lambda: load_session_data(session_data_paths)),
+            "read_days": best_of(repeat, lambda: ScheduleBuilder(session_data_by_id).read_days(schedule_data["days"])),
+            "load_schedule": best_of(repeat, lambda: load_schedule(schedule_path, session_data_paths)),
+            "save_sessions": best_of(repeat, lambda: save_sessions(save_path, session_data_by_id.values())),
+            "save_sessions_fast": best_of(repeat, lambda: save_sessions(save_path, session_data_by_id.values(), fast=True)),
+            "save_sessions_json": best_of(repeat, lambda: save_sessions(save_path, session_data_by_id.values(), format="json")),
+            "html_cold": best_of(repeat, render_cold),
+        }
+        render_cold()
+        timings["html_warm"] = best_of(repeat, lambda: render_all(schedule))
+
+        return {
+            "sessions": len(session_data_by_id),
+            "speakers": len(schedule.speakers_by_id),
+            "seconds": timings,
+            "memory": measure_memory(lambda: load_schedule(schedule_path, session_data_paths)),
+        }
+
+
+def print_results(results: dict, baseline: dict | None):
+    for scale, result in results.items():
+        print(f"{scale}: {result['sessions']} sessions, {result['speakers']} speakers")
+        base = (baseline or {}).get(scale)
+        for name, seconds in result["seconds"].items():
+            line = f"  {name:<20} {seconds * 1000:10.2f} ms"
+            if base and (base_seconds := base["seconds"].get(name)):
+                line += f"   {base_seconds * 1000:10.2f} ms before ({seconds / base_seconds:5.2f}x)"
+            print(line)
+        for name, size in result["memory"].items():
+            line = f"  {name:<20} {size / 1024:10.0f} KB"
+            if base and (base_size := base["memory"].get(name)):
+                line += f"   {base_size / 1024:10.0f} KB before ({size / base_size:5.2f}x)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sessionmodel benchmarks")
+    parser.add_argument("--scales", default="small,medium,large", help=f"comma separated, from: {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="compare against results previously written with --json")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {scale: run_scale(SCALES[scale], args.repeat) for scale in args.scales.split(",")}
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
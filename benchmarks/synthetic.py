@@ -0,0 +1,200 @@
+"""
+Generates synthetic conference data, in the same layout load_schedule_for_year expects:
+    <data_root>/fixed_session_data.yml
+    <data_root>/<year>/session_data.yml
+    <data_root>/<year>/session_data_overrides.yml
+    <data_root>/<year>/schedule.yml
+
+Run from the directory containing the sessionmodel package:
+    python -m sessionmodel.benchmarks.synthetic <data_root> [year] [days] [rooms] [timeslots_per_day]
+"""
+import copy
+import datetime
+import os
+import random
+import sys
+from dataclasses import dataclass
+
+from sessionmodel.yaml_io import write_yaml
+
+_words = ("performance latency throughput cache memory allocator vector parallel concurrency lock free "
+          "template compile time constexpr module package build link debug profile trace test fuzz "
+          "design pattern type system safety error handling async coroutine network embedded graphics").split()
+
+_tags = ["performance", "testing", "tooling", "concurrency", "embedded", "design", "safety", "gamedev", "education", "networking"]
+_audiences = ["beginner", "intermediate", "advanced"]
+
+
+@dataclass
+class ConferenceSpec:
+    days: int = 3  # main conference days
+    rooms: int = 5
+    timeslots_per_day: int = 8  # talk timeslots, not including breaks
+    speakers_per_session: int = 1
+    speaker_pool_factor: float = 0.8  # number of distinct speakers, relative to speaker slots
+    missing_bio_fraction: float = 0.05
+    override_fraction: float = 0.1  # fraction of sessions with an entry in the overrides file
+    split_slot_fraction: float = 0.1  # fraction of session slots holding two half-length sessions
+    workshop_days: int = 1  # days of (multi-day) workshops before the conference
+    seed: int = 1
+
+    @property
+    def session_count(self) -> int:
+        return self.days * self.rooms * self.timeslots_per_day
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_words) for _ in range(words))
+
+
+def _markdown(rng: random.Random, paragraphs: int) -> str:
+    return "\n\n".join(f"{_text(rng, 30).capitalize()}, with *emphasis*, `code` and https://example.com/{rng.randint(0, 999)}."
+                       for _ in range(paragraphs))
+
+
+def _time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def make_speaker(rng: random.Random, speaker_id: int, missing_bio_fraction: float = 0.0) -> dict:
+    speaker = {
+        "id": speaker_id,
+        "name": f"{_text(rng, 1).capitalize()} Speaker{speaker_id}",
+    }
+    if rng.random() >= missing_bio_fraction:
+        speaker["bio"] = _markdown(rng, 1)
+    speaker["links"] = [{"service_name": "web", "url": f"https://example.com/speakers/{speaker_id}"}]
+    return speaker
+
+
+def make_session(rng: random.Random, session_id: str, speakers: list[dict], session_type: str = "session", length: str = "60") -> dict:
+    session = {
+        "id": session_id,
+        "title": f"{_text(rng, 5).capitalize()} ({session_id})",
+        "abstract": _markdown(rng, 3),
+        "length": length,
+        "audience": rng.sample(_audiences, rng.randint(1, 2)),
+        "tags": rng.sample(_tags, rng.randint(1, 3)),
+        "speakers": speakers,
+        "outline": _markdown(rng, 2) if rng.random() < 0.3 else None,
+        "type": session_type,
+    }
+    if len(speakers) > 1:
+        session["lead_presenter"] = speakers[-1]["id"]
+    return session
+
+
+def make_session_data(count: int, speakers_per_session: int = 2, seed: int = 1) -> list[dict]:
+    """
+    Just session data - e.g. for benchmarking YAML I/O on its own
+    """
+    rng = random.Random(seed)
+    return [
+        make_session(rng, f"session-{i}", [make_speaker(rng, i * speakers_per_session + n) for n in range(speakers_per_session)])
+        for i in range(count)]
+
+
+def generate_conference(data_root: str, year: str = "2030", spec: ConferenceSpec = ConferenceSpec()) -> list[str]:
+    """
+    Writes a synthetic conference for the given year under data_root. Returns the paths written
+    """
+    rng = random.Random(spec.seed)
+    speaker_count = max(1, int(spec.session_count * spec.speakers_per_session * spec.speaker_pool_factor))
+    speakers = [make_speaker(rng, speaker_id, spec.missing_bio_fraction) for speaker_id in range(speaker_count)]
+
+    fixed_sessions = [
+        {"id": break_id, "title": title, "abstract": title, "length": length, "audience": [], "tags": [],
+         "speakers": [], "outline": None, "type": "break", "reusable": True}
+        for break_id, title, length in [("break", "Break", "15"), ("lunch", "Lunch", "60")]]
+
+    sessions = []
+
+    def new_session(session_type: str = "session", length: str = "60", multi: bool = False) -> str:
+        # Copied, so the YAML doesn't use anchors and aliases for speakers shared between sessions
+        session_speakers = copy.deepcopy(rng.sample(speakers, spec.speakers_per_session))
+        session = make_session(rng, f"{year}-{len(sessions)}", session_speakers, session_type, length)
+        if multi:
+            session["multi"] = True
+        sessions.append(session)
+        return session["id"]
+
+    rooms = list(range(spec.rooms))
+    days = []
+    start_date = datetime.date(int(year), 6, 1)
+
+    # Workshops run across all the workshop days, one per room
+    workshops = [new_session("workshop", f"{spec.workshop_days} days", multi=True) for _ in rooms] if spec.workshop_days else []
+    for day_num in range(spec.workshop_days):
+        days.append({
+            "date": str(start_date + datetime.timedelta(days=day_num)),
+            "day_num": day_num,
+            "day": f"Workshop day {day_num + 1}",
+            "type": "workshop",
+            "label": "Workshops",
+            "alt_label": "Pre-conference workshops",
+            "rooms": list(rooms),
+            "timeslots": [{"time": ["09:00", "17:00"], "sessions": list(workshops)}],
+        })
+
+    for conference_day in range(spec.days):
+        day_num = spec.workshop_days + conference_day
+        timeslots = []
+        minutes = 9 * 60
+        for slot in range(spec.timeslots_per_day):
+            slot_sessions = []
+            for _ in rooms:
+                if rng.random() < spec.split_slot_fraction:
+                    middle = minutes + 30
+                    slot_sessions.append({"session_slot": [
+                        {"session": new_session(length="30"), "time": [_time(minutes), _time(middle)]},
+                        {"session": new_session(length="30"), "time": [_time(middle), _time(minutes + 60)]}]})
+                else:
+                    slot_sessions.append(new_session())
+            timeslots.append({"time": [_time(minutes), _time(minutes + 60)], "sessions": slot_sessions})
+            minutes += 60
+
+            # A break between each pair of talks, and lunch in the middle of the day
+            break_id, length = ("lunch", 60) if slot == spec.timeslots_per_day // 2 - 1 else ("break", 15)
+            if slot < spec.timeslots_per_day - 1:
+                timeslots.append({"time": [_time(minutes), _time(minutes + length)], "type": "break", "sessions": [break_id]})
+                minutes += length
+
+        days.append({
+            "date": str(start_date + datetime.timedelta(days=day_num)),
+            "day_num": day_num,
+            "day": f"Day {conference_day + 1}",
+            "rooms": list(rooms),
+            "timeslots": timeslots,
+        })
+
+    overrides = [
+        {"id": session["id"], "title": session["title"] + " (updated)",
+         "speakers": [{"id": speaker["id"], "bio": _markdown(rng, 1)} for speaker in session["speakers"][:1]]}
+        for session in rng.sample(sessions, int(len(sessions) * spec.override_fraction))]
+
+    schedule = {
+        "year": int(year),
+        "room_names": [f"Room {room + 1}" for room in rooms],
+        "default_header": None,
+        "tracks": {},
+        "days": days,
+    }
+
+    os.makedirs(os.path.join(data_root, year), exist_ok=True)
+    paths = {
+        os.path.join(data_root, "fixed_session_data.yml"): fixed_sessions,
+        os.path.join(data_root, year, "session_data.yml"): sessions,
+        os.path.join(data_root, year, "session_data_overrides.yml"): overrides,
+        os.path.join(data_root, year, "schedule.yml"): schedule,
+    }
+    for path, data in paths.items():
+        write_yaml(path, data, fast=True)
+    return list(paths)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    generate_conference(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "2030",
+                        ConferenceSpec(*[int(arg) for arg in sys.argv[3:6]]))
@@ -0,0 +1,323 @@
+import copy
+import os
+from dataclasses import dataclass, field
+
+from sessionmodel.Sessions import load_yaml, parse_sessions
+from sessionmodel.schedule_builder import (ScheduleBuilder, build_schedule, build_workshop_groups, collect_speakers,
+                                           link_day_sessions, register_schedule)
+from sessionmodel.session_layers import SessionLayers
+from sessionmodel.schedule_model import Schedule, Day, Speaker
+from sessionmodel.slug_registry import slugify_cached
+
+
+@dataclass
+class ScheduleChanges:
+    """
+    What an update changed. Session ids are ids of session data (keys of Schedule.all_sessions_by_id)
+    """
+    full_rebuild: bool = False
+    added_sessions: set[str] = field(default_factory=set)
+    removed_sessions: set[str] = field(default_factory=set)
+    updated_sessions: set[str] = field(default_factory=set)
+    rebuilt_days: list[int] = field(default_factory=list)  # indices into Schedule.days
+    added_slugs: set[str] = field(default_factory=set)
+    removed_slugs: set[str] = field(default_factory=set)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.full_rebuild or self.added_sessions or self.removed_sessions or self.updated_sessions
+                    or self.rebuilt_days or self.added_slugs or self.removed_slugs)
+
+
+class _FullRebuild(Exception):
+    """
+    Raised internally when a change cannot be applied incrementally
+    """
+
+
+def _day_sessions(day: Day):
+    for timeslot in day.timeslots:
+        for session_slot in timeslot.session_slots:
+            yield from session_slot.sessions
+
+
+def _unique(sessions):
+    return list({id(session): session for session in sessions}.values())
+
+
+class IncrementalScheduleLoader:
+    """
+    Loads a schedule, keeping the raw contents of each input file, so that when some of those
+    files change the schedule can be patched in place rather than rebuilt:
+     - only session records whose data changed (in any layer) are re-merged and re-parsed
+     - only days whose entries in the schedule file changed are re-read
+    Changes that can't be applied locally (e.g. the room names, a scheduled session being removed,
+    or a day holding a session that spans other days) fall back to a full rebuild.
+    """
+    def __init__(self, schedule_path: str, session_data_paths: [str], placeholder_profile: str | None = None):
+        self.schedule_path = schedule_path
+        self.session_data_paths = session_data_paths
+        self.placeholder_profile = placeholder_profile
+        self.schedule: Schedule | None = None
+
+        self._layers = SessionLayers()  # a layer per session data path
+        self._schedule_data = None
+        self._positions = {}  # session id -> position in merge order
+        self._scheduled_by_id = {}  # session id -> [schedule_model.Session]
+        self._speaker_sessions = {}  # speaker id -> {session id: None} (an ordered set)
+
+    def load(self) -> Schedule:
+        """
+        Reads all input files and builds the schedule from scratch
+        """
+        self._layers = SessionLayers.from_files(self.session_data_paths)
+        self._schedule_data = load_yaml(self.schedule_path)
+        return self._build()
+
+    def _build(self) -> Schedule:
+        # Parsing modifies the data, so work on copies of the merged data
+        all_session_data = [self._layers.merged_copy(session_id) for session_id in self._layers]
+        session_data_by_id = {session.id: session for session in parse_sessions(all_session_data)}
+        speakers_by_id = collect_speakers(session_data_by_id, self.placeholder_profile)
+        self.schedule = build_schedule(copy.deepcopy(self._schedule_data), session_data_by_id, speakers_by_id)
+        register_schedule(self.schedule)
+
+        self._positions = {session_id: position for position, session_id in enumerate(session_data_by_id)}
+        self._speaker_sessions = {}
+        for session in session_data_by_id.values():
+            self._add_speaker_sessions(session)
+        self._scheduled_by_id = {}
+        for session in self.schedule.sessions_by_slug.values():
+            self._scheduled_by_id.setdefault(session.id, []).append(session)
+        return self.schedule
+
+    def update(self, changed_paths: [str]) -> ScheduleChanges:
+        """
+        Re-reads the given (changed) input files and patches the schedule to match.
+        Paths that are not inputs of this schedule are ignored
+        """
+        if self.schedule is None:
+            self.load()
+            return ScheduleChanges(full_rebuild=True)
+
+        changed = {os.path.abspath(path) for path in changed_paths}
+        changes = ScheduleChanges()
+        # Layers are replaced, never modified, on reload, so this is enough to put them back
+        previous_layers = {name: self._layers.layer(name) for name in self._layers.layer_names}
+        try:
+            affected_ids = set()
+            for path in self.session_data_paths:
+                if os.path.abspath(path) in changed:
+                    affected_ids.update(self._layers.reload(path))
+            if affected_ids:
+                self._update_sessions(affected_ids, changes)
+
+            if os.path.abspath(self.schedule_path) in changed:
+                new_schedule_data = load_yaml(self.schedule_path)
+                self._update_days(new_schedule_data, changes)
+                self._schedule_data = new_schedule_data
+        except _FullRebuild:
+            if os.path.abspath(self.schedule_path) in changed:
+                self._schedule_data = load_yaml(self.schedule_path)
+            self._build()
+            return ScheduleChanges(full_rebuild=True)
+        except Exception:
+            # The schedule may be partly patched, so rebuild it from the previous inputs - which also
+            # means the same change is seen again next time, once whatever was wrong with it is fixed
+            for name, layer in previous_layers.items():
+                self._layers.replace_layer(name, list(layer.values()))
+            self._build()
+            raise
+        if changes.added_slugs or changes.removed_slugs:
+            # Re-publishing keeps the registry's slug index in step
+            register_schedule(self.schedule)
+        return changes
+
+    def _add_speaker_sessions(self, session):
+        for speaker in session.speakers:
+            self._speaker_sessions.setdefault(speaker.id, {})[session.id] = None
+
+    def _update_sessions(self, affected_ids: set[str], changes: ScheduleChanges):
+        schedule = self.schedule
+        merged = {session_id: self._layers.merged_copy(session_id) for session_id in affected_ids}
+        new_sessions = parse_sessions([data for data in merged.values() if data is not None])
+
+        # Check everything can be applied before changing anything
+        for session_id, data in merged.items():
+            if data is None and self._scheduled_by_id.get(session_id):
+                raise _FullRebuild()
+        for session in new_sessions:
+            if scheduled := self._scheduled_by_id.get(session.id):
+                old = scheduled[0].data
+                if session.reusable != old.reusable or session.multi != old.multi:
+                    raise _FullRebuild()
+                if session.reusable and slugify_cached(session.title) != slugify_cached(old.title):
+                    raise _FullRebuild()
+        # Numbered slugs of reusable sessions are kept (we checked the title, and so the base slug, is unchanged)
+        renamed_slugs = {}  # old slug -> new slug
+        for session in new_sessions:
+            if not session.reusable:
+                for scheduled_session in self._scheduled_by_id.get(session.id, []):
+                    if (new_slug := slugify_cached(session.title)) != scheduled_session.slug:
+                        renamed_slugs[scheduled_session.slug] = new_slug
+        taken_slugs = schedule.sessions_by_slug.keys() - renamed_slugs.keys()
+        for new_slug in renamed_slugs.values():
+            if new_slug in taken_slugs:
+                raise Exception(f"Two sessions have the same slug, '{new_slug}'")
+            taken_slugs.add(new_slug)
+
+        touched_speakers = set()
+        workshops_changed = False
+        for session_id, data in merged.items():
+            if data is None and (old := schedule.all_sessions_by_id.pop(session_id, None)):
+                touched_speakers.update(speaker.id for speaker in old.speakers)
+                for speaker in old.speakers:
+                    self._speaker_sessions[speaker.id].pop(session_id, None)
+                changes.removed_sessions.add(session_id)
+
+        for session in new_sessions:
+            if old := schedule.all_sessions_by_id.get(session.id):
+                touched_speakers.update(speaker.id for speaker in old.speakers)
+                for speaker in old.speakers:
+                    self._speaker_sessions[speaker.id].pop(session.id, None)
+                changes.updated_sessions.add(session.id)
+            else:
+                self._positions[session.id] = len(self._positions)
+                changes.added_sessions.add(session.id)
+            schedule.all_sessions_by_id[session.id] = session
+            self._add_speaker_sessions(session)
+            touched_speakers.update(speaker.id for speaker in session.speakers)
+
+            for scheduled_session in self._scheduled_by_id.get(session.id, []):
+                workshops_changed = workshops_changed or scheduled_session.is_workshop or session.is_workshop
+                self._update_scheduled_session(scheduled_session, session)
+
+        if renamed_slugs:
+            # Re-key in place, keeping the schedule order
+            sessions_by_slug = schedule.sessions_by_slug
+            items = [(renamed_slugs.get(slug, slug), s) for slug, s in sessions_by_slug.items()]
+            sessions_by_slug.clear()
+            sessions_by_slug.update(items)
+            changes.removed_slugs.update(renamed_slugs.keys())
+            changes.added_slugs.update(renamed_slugs.values())
+
+        for speaker_id in touched_speakers:
+            self._update_speaker(speaker_id)
+
+        if workshops_changed:
+            schedule.workshop_groups[:] = build_workshop_groups(schedule.days)
+
+    def _update_scheduled_session(self, scheduled_session, session):
+        schedule = self.schedule
+        session.scheduled = True
+        # The indexes must drop the session while it still has its old data (and slug)
+        schedule.index.remove(scheduled_session)
+        schedule.search_index.remove_session(scheduled_session)
+        scheduled_session.data = session
+        scheduled_session.track = schedule.tracks[session.track] if session.track else {}
+        if len(session.speakers) > 1:
+            session.speakers.sort(key=lambda s: s.id != session.lead_presenter)
+        scheduled_session.reset_speakers()
+
+        if not session.reusable:
+            scheduled_session._slug = None  # sessions_by_slug is re-keyed to match, by _update_sessions
+
+        schedule.index.add(scheduled_session)
+        schedule.search_index.add_session(scheduled_session)
+
+    def _update_speaker(self, speaker_id):
+        speakers_by_id = self.schedule.speakers_by_id
+        session_ids = self._speaker_sessions.get(speaker_id)
+        if not session_ids:
+            self._speaker_sessions.pop(speaker_id, None)
+            speakers_by_id.pop(speaker_id, None)
+            self.schedule.search_index.remove_speaker(speaker_id)
+            return
+        # As in a full build, the speaker comes from the first session they appear in
+        first_id = min(session_ids, key=self._positions.__getitem__)
+        speaker_data = next(s for s in self.schedule.all_sessions_by_id[first_id].speakers if s.id == speaker_id)
+        if (speaker := speakers_by_id.get(speaker_id)) is None:
+            speaker = speakers_by_id[speaker_id] = Speaker(speaker_data)
+        elif speaker.data is not speaker_data:
+            # Sessions keep hold of the speaker, so update it in place
+            speaker.data = speaker_data
+        if speaker_data.profile_pic is None:
+            speaker_data.profile_pic = self.placeholder_profile
+        self.schedule.search_index.add_speaker(speaker)
+
+    def _update_days(self, new_data: dict, changes: ScheduleChanges):
+        schedule = self.schedule
+        old_data = self._schedule_data
+        old_days = old_data["days"]
+        new_days = new_data["days"]
+        if ({key: value for key, value in old_data.items() if key != "days"} !=
+                {key: value for key, value in new_data.items() if key != "days"}):
+            raise _FullRebuild()
+        if len(old_days) != len(new_days):
+            raise _FullRebuild()
+        changed_indices = [index for index, (old, new) in enumerate(zip(old_days, new_days)) if old != new]
+        if not changed_indices:
+            return
+
+        old_sessions = _unique(session for index in changed_indices for session in _day_sessions(schedule.days[index]))
+        if any(len(session.day) > 1 for session in old_sessions):
+            raise _FullRebuild()  # a session spanning days would need re-reading across all of them
+
+        builder = ScheduleBuilder(schedule.all_sessions_by_id)
+        rebuilt_days = builder.read_days(copy.deepcopy([new_days[index] for index in changed_indices]))
+        new_sessions = _unique(session for day in rebuilt_days for session in _day_sessions(day))
+
+        # Reusable sessions are numbered in schedule order, so give the rebuilt days the same numbers
+        # as they had before. If the number of uses changes, every later number would change too
+        def reusable_slugs(sessions) -> dict:
+            slugs = {}
+            for session in sessions:
+                if session.data.reusable:
+                    slugs.setdefault(slugify_cached(session.data.title), []).append(session)
+            return slugs
+        old_reusable = reusable_slugs(old_sessions)
+        new_reusable = reusable_slugs(new_sessions)
+        if {base: len(sessions) for base, sessions in old_reusable.items()} != {base: len(sessions) for base, sessions in new_reusable.items()}:
+            raise _FullRebuild()
+        for base, sessions in new_reusable.items():
+            for old_session, new_session in zip(old_reusable[base], sessions):
+                new_session._slug = old_session.slug
+
+        # Work out the new slug mapping, in schedule order, before changing anything
+        old_slugs = {session.slug for session in old_sessions}
+        days = list(schedule.days)
+        for index, day in zip(changed_indices, rebuilt_days):
+            days[index] = day
+        sessions_by_slug = {}
+        for day in days:
+            for session in _day_sessions(day):
+                if (existing := sessions_by_slug.get(session.slug)) is None:
+                    sessions_by_slug[session.slug] = session
+                elif existing is not session:
+                    if session.data.multi:
+                        raise _FullRebuild()  # now spans days
+                    raise Exception(f"Two sessions have the same slug, '{session.slug}'")
+
+        for index, day in zip(changed_indices, rebuilt_days):
+            schedule.days[index] = day
+            link_day_sessions(schedule, day)
+        schedule.sessions_by_slug.clear()
+        schedule.sessions_by_slug.update(sessions_by_slug)
+
+        for session in old_sessions:
+            self._scheduled_by_id[session.id] = [s for s in self._scheduled_by_id[session.id] if s is not session]
+            schedule.index.remove(session)
+            schedule.search_index.remove_session(session)
+        for session in new_sessions:
+            session.data.scheduled = True
+            self._scheduled_by_id.setdefault(session.id, []).append(session)
+            schedule.index.add(session)
+            schedule.search_index.add_session(session)
+
+        if any(session.is_workshop for session in old_sessions + new_sessions):
+            schedule.workshop_groups[:] = build_workshop_groups(schedule.days)
+
+        new_slugs = {session.slug for session in new_sessions}
+        changes.rebuilt_days.extend(changed_indices)
+        changes.removed_slugs |= old_slugs - new_slugs
+        changes.added_slugs |= new_slugs - old_slugs
@@ -0,0 +1,154 @@
+import functools
+import threading
+import time
+
+from sessionmodel.logging import log_info
+
+# The current sink, or None when instrumentation is disabled (the default).
+# Everything checks this first, so disabled instrumentation costs little more than a function call
+_sink = None
+
+
+class CollectingSink:
+    """
+    Accumulates span timings (count, total and max seconds per name) and counters
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def on_span(self, name: str, seconds: float):
+        with self._lock:
+            if (stats := self.spans.get(name)) is None:
+                stats = self.spans[name] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def on_count(self, name: str, n: int):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "spans": {name: dict(stats) for name, stats in self.spans.items()},
+                "counters": dict(self.counters)
+            }
+
+    def to_json(self, indent: int | None = 2) -> str:
+        import json
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def write_json(self, filename: str):
+        with open(filename, "w") as f:
+            f.write(self.to_json())
+
+    def report(self) -> str:
+        """
+        A human-readable summary, slowest phases first
+        """
+        data = self.as_dict()
+        lines = [f"{'phase':<32} {'calls':>8} {'total ms':>12} {'max ms':>10}"]
+        for name, stats in sorted(data["spans"].items(), key=lambda item: -item[1]["total_seconds"]):
+            lines.append(f"{name:<32} {stats['count']:>8} {stats['total_seconds'] * 1000:>12.2f} {stats['max_seconds'] * 1000:>10.2f}")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<32} {value:>8}")
+        return "\n".join(lines)
+
+
+class LoggingSink:
+    """
+    Logs every span (and, optionally, counter) as it happens
+    """
+    def __init__(self, log_counters: bool = False):
+        self.log_counters = log_counters
+
+    def on_span(self, name: str, seconds: float):
+        log_info("%s: %.2f ms", name, seconds * 1000)
+
+    def on_count(self, name: str, n: int):
+        if self.log_counters:
+            log_info("%s: +%d", name, n)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if (sink := _sink) is not None:
+            sink.on_span(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+def enable_instrumentation(sink=None):
+    """
+    Starts sending timings and counts to the sink (any object with on_span(name, seconds) and
+    on_count(name, n) methods), by default a new CollectingSink. Returns the sink
+    """
+    global _sink
+    _sink = sink if sink is not None else CollectingSink()
+    return _sink
+
+
+def disable_instrumentation():
+    global _sink
+    _sink = None
+
+
+def get_sink():
+    return _sink
+
+
+def span(name: str):
+    """
+    Times the body of a with block, e.g.
+        with span("parse_sessions"):
+            ...
+    """
+    return _null_span if _sink is None else _Span(name)
+
+
+def count(name: str, n: int = 1):
+    if (sink := _sink) is not None:
+        sink.on_count(name, n)
+
+
+def timed(name: str):
+    """
+    Decorator that times every call of a function as a span
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
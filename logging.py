@@ -1,19 +1,153 @@
-def log_info(*args, **kwargs):
-    try:
-        from glassware.logging import log_info
-    except:
-        pass
+import threading
+from contextlib import contextmanager
+
+# The same values as the standard library's levels (which is only imported if it is used)
+DEBUG = 10
+INFO = 20
+WARN = 30
+ERROR = 40
+
+_level = INFO
+_level_set = False
+_aggregate_warnings = True
+
+# Resolved on first use: glassware's logging if it is available, otherwise the standard library's.
+# _backend maps each level to a function taking (message, *args); _backend_enabled says whether the
+# backend itself will output a level (the standard library's logger has a level of its own)
+_backend = None
+_backend_enabled = None
+_stdlib_logger = None
+_aggregation = threading.local()
+
+
+def _formatting(log):
+    return lambda message, *args: log(message % args if args else message)
+
 
-def log_error(*args, **kwargs):
+def _resolve_backend():
+    global _backend, _backend_enabled, _stdlib_logger
     try:
-        from glassware.logging import log_error
-    except:
-        pass
+        from glassware.logging import log_info, log_warn, log_error
+        _backend = {INFO: _formatting(log_info), WARN: _formatting(log_warn), ERROR: _formatting(log_error),
+                    DEBUG: _formatting(log_info)}
+        _backend_enabled = lambda level: True
+    except ImportError:
+        import logging
+        _stdlib_logger = logger = logging.getLogger("sessionmodel")
+        if _level_set:
+            logger.setLevel(_level)
+        # The logger formats the message itself, and only if it is going to output it
+        _backend = {INFO: logger.info, WARN: logger.warning, ERROR: logger.error, DEBUG: logger.debug}
+        _backend_enabled = logger.isEnabledFor
+
+
+def set_log_level(level: int):
+    """
+    Messages below this level are dropped before they are formatted.
+    With the standard library's logging, this also sets the level of the "sessionmodel" logger
+    """
+    global _level, _level_set
+    _level = level
+    _level_set = True
+    if _stdlib_logger is not None:
+        _stdlib_logger.setLevel(level)
+
+
+def log_enabled(level: int) -> bool:
+    if level < _level:
+        return False
+    if _backend is None:
+        _resolve_backend()
+    return _backend_enabled(level)
+
+
+def set_warning_aggregation(enabled: bool):
+    """
+    When enabled (the default), repeated warnings logged through log_warn_aggregated within an
+    aggregated_warnings block are summarised as one line, rather than logged one by one
+    """
+    global _aggregate_warnings
+    _aggregate_warnings = enabled
+
 
+def _log(level: int, message, args):
+    if log_enabled(level):
+        _backend[level](message, *args)
 
-def log_warn(*args, **kwargs):
+
+def log_debug(message, *args):
+    _log(DEBUG, message, args)
+
+
+def log_info(message, *args):
+    """
+    Logs message % args (formatting only happens if the message will be logged)
+    """
+    _log(INFO, message, args)
+
+
+def log_warn(message, *args):
+    _log(WARN, message, args)
+
+
+def log_error(message, *args):
+    _log(ERROR, message, args)
+
+
+class WarningCounts:
+    """
+    Warnings logged through log_warn_aggregated, counted by kind, with the first few examples of each.
+    Pass one to log_warn_aggregated to aggregate warnings without any thread-wide state (e.g. in a
+    generator, which may be suspended while other code logs), then call log_summary at the end
+    """
+    def __init__(self):
+        self.counts = {}  # summary -> (count, [examples])
+
+    def add(self, summary: str, example):
+        count, examples = self.counts.get(summary, (0, []))
+        if len(examples) < 3 and (example := str(example)) not in examples:
+            examples.append(example)
+        self.counts[summary] = (count + 1, examples)
+
+    def log_summary(self):
+        """
+        Logs one line per kind of warning, "<count> <summary> (<first few examples>)", and resets the counts
+        """
+        counts, self.counts = self.counts, {}
+        for summary, (count, examples) in counts.items():
+            more = ", ..." if count > len(examples) else ""
+            log_warn("%d %s (%s%s)", count, summary, ", ".join(examples), more)
+
+
+@contextmanager
+def aggregated_warnings():
+    """
+    Within this block, warnings logged through log_warn_aggregated (without their own WarningCounts)
+    in this thread are counted, by kind, and one summary line per kind is logged at the end.
+    Nested blocks report with the outermost one. Don't yield from inside one - use a WarningCounts
+    """
+    if getattr(_aggregation, "counts", None) is not None:
+        yield
+        return
+    _aggregation.counts = counts = WarningCounts()
     try:
-        from glassware.logging import log_warn
-    except:
-        pass
+        yield
+    finally:
+        _aggregation.counts = None
+        counts.log_summary()
+
 
+def log_warn_aggregated(summary: str, example, message, *args, counts: WarningCounts | None = None):
+    """
+    Logs a warning that may be repeated many times. If counts is given, or inside an aggregated_warnings
+    block, it is just counted, and later reported as "<count> <summary> (<first few examples>)";
+    otherwise message % args is logged as normal
+    """
+    if not log_enabled(WARN):
+        return
+    if counts is None:
+        counts = getattr(_aggregation, "counts", None)
+    if counts is None or not _aggregate_warnings:
+        _log(WARN, message, args)
+        return
+    counts.add(summary, example)
@@ -0,0 +1,186 @@
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sessionmodel.instrumentation import count, span
+
+
+# pykyll.markdown's render_markdown, imported on first render, so that just importing the model
+# doesn't load the markdown renderer
+_markdown_renderer = None
+
+# Bump this whenever the way markdown is rendered changes in a way renderer_version() can't see
+# (e.g. the options passed in), so on-disk stores don't keep serving the old HTML
+RENDER_FORMAT_VERSION = 1
+
+
+def _render_markdown(text: str | None, **options) -> str:
+    global _markdown_renderer
+    if _markdown_renderer is None:
+        from pykyll.markdown import render_markdown as _markdown_renderer
+    return _markdown_renderer(text, **options)
+
+
+def renderer_version() -> str:
+    """
+    Identifies the markdown renderer: RENDER_FORMAT_VERSION plus a hash of pykyll.markdown's source.
+    pykyll is a submodule, without a package version, so any change to it gives a new hash
+    """
+    import importlib.util
+    digest = hashlib.sha256()
+    if (spec := importlib.util.find_spec("pykyll.markdown")) is not None and spec.origin:
+        with open(spec.origin, "rb") as f:
+            digest.update(f.read())
+    return f"{RENDER_FORMAT_VERSION}-{digest.hexdigest()[:16]}"
+
+
+class RenderCache:
+    """
+    Memoizes render_markdown results, keyed by a hash of the text and the render options.
+    Entries are held in a bounded, least-recently-used, in-memory cache, optionally backed
+    by an SQLite file so that rendered HTML can be shared between builds and processes.
+    Keys include the renderer's version (by default, renderer_version()), so a store shared between
+    builds never returns HTML from a different renderer
+    """
+    # Number of new disk entries to batch up before committing
+    commit_interval = 256
+
+    def __init__(self, max_entries: int = 8192, path: str | None = None, renderer: str | None = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._renderer = renderer
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._pending_writes = 0
+        if path is not None:
+            import sqlite3
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS renders (key TEXT PRIMARY KEY, html TEXT NOT NULL)")
+            self._db.commit()
+
+    @property
+    def renderer(self) -> str:
+        # Worked out on first use, as it reads the renderer's source
+        if self._renderer is None:
+            self._renderer = renderer_version()
+        return self._renderer
+
+    @staticmethod
+    def make_key(text: str, options: dict, renderer: str = "") -> str:
+        digest = hashlib.sha256(renderer.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        digest.update(repr(sorted(options.items())).encode("utf-8"))
+        return digest.hexdigest()
+
+    def render(self, text: str | None, **options) -> str:
+        if not isinstance(text, str):
+            # Nothing worth caching (e.g. a missing outline)
+            return _render_markdown(text, **options)
+
+        key = self.make_key(text, options, self.renderer)
+        with self._lock:
+            if (html := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                count("render.hits")
+                return html
+            if self._db is not None:
+                row = self._db.execute("SELECT html FROM renders WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    count("render.disk_hits")
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            count("render.misses")
+
+        # Render outside the lock, so other threads are not held up.
+        # At worst two threads render the same text at the same time
+        with span("markdown.render"):
+            html = _render_markdown(text, **options)
+
+        with self._lock:
+            self._remember(key, html)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO renders (key, html) VALUES (?, ?)", (key, html))
+                self._pending_writes += 1
+                if self._pending_writes >= self.commit_interval:
+                    self._commit()
+        return html
+
+    def _remember(self, key: str, html: str):
+        self._entries[key] = html
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _commit(self):
+        self._db.commit()
+        self._pending_writes = 0
+
+    def flush(self):
+        """
+        Commits any pending entries to the on-disk store
+        """
+        with self._lock:
+            if self._db is not None and self._pending_writes:
+                self._commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
+
+    def clear(self, disk: bool = False):
+        """
+        Drops all in-memory entries and resets the counters. The on-disk store may be shared with
+        other builds, so its entries are only deleted if disk is True
+        """
+        with self._lock:
+            self._entries.clear()
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM renders")
+                self._commit()
+            self.hits = self.disk_hits = self.misses = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._entries)
+        }
+
+
+_render_cache = RenderCache()
+atexit.register(lambda: _render_cache.close())
+
+
+def configure_render_cache(max_entries: int = 8192, path: str | None = None, renderer: str | None = None) -> RenderCache:
+    """
+    Replaces the shared render cache, e.g. to give it an on-disk store at path
+    """
+    global _render_cache
+    _render_cache.close()
+    _render_cache = RenderCache(max_entries, path, renderer)
+    return _render_cache
+
+
+def get_render_cache() -> RenderCache:
+    return _render_cache
+
+
+def render_markdown_cached(text: str | None, **options) -> str:
+    """
+    Equivalent to pykyll.markdown.render_markdown, but goes through the shared render cache
+    """
+    return _render_cache.render(text, **options)
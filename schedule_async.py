@@ -0,0 +1,94 @@
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from contextlib import nullcontext
+
+from sessionmodel.instrumentation import span
+from sessionmodel.logging import log_info
+from sessionmodel.schedule_builder import (build_schedule, collect_speakers, merge_session_layers, register_schedule,
+                                           schedule_paths_for_year)
+from sessionmodel.schedule_cache import (read_cached_schedule, schedule_cache_key_for_contents, schedule_cache_path,
+                                         write_cached_schedule)
+from sessionmodel.schedule_model import Schedule
+from sessionmodel.Sessions import parse_sessions
+from sessionmodel.yaml_io import parse_yaml
+
+# Loads of the same year are serialised, so an older load can never be published over a newer one.
+# asyncio locks belong to a loop, so they are kept per loop: loop -> {year: asyncio.Lock}
+_year_locks = weakref.WeakKeyDictionary()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def read_files(paths: [str]) -> list[bytes]:
+    """
+    Reads the files concurrently, each in a worker thread
+    """
+    return list(await asyncio.gather(*(asyncio.to_thread(_read_file, path) for path in paths)))
+
+
+def build_schedule_from_contents(schedule_content: bytes, session_data_contents: [bytes],
+                                 placeholder_profile: str | None = None, cache_path: str | None = None) -> Schedule:
+    """
+    Does what load_schedule does, but from the already read contents of the input files, and without
+    registering the schedule - so it can run in any executor, including a process pool.
+    If cache_path is given, the schedule is read from (or written to) the cache there
+    """
+    cache_key = None
+    if cache_path is not None:
+        cache_key = schedule_cache_key_for_contents(session_data_contents + [schedule_content])
+        if schedule := read_cached_schedule(cache_path, cache_key):
+            return schedule
+
+    with span("yaml.load"):
+        layers = [parse_yaml(content) for content in session_data_contents]
+        schedule_data = parse_yaml(schedule_content)
+    session_data_by_id = {session.id: session for session in parse_sessions(merge_session_layers(layers).values())}
+    schedule = build_schedule(schedule_data, session_data_by_id, collect_speakers(session_data_by_id, placeholder_profile))
+    if cache_path is not None:
+        write_cached_schedule(cache_path, cache_key, schedule)
+    return schedule
+
+
+def _year_lock(loop: asyncio.AbstractEventLoop, year: str | None):
+    if year is None:
+        return nullcontext()
+    return _year_locks.setdefault(loop, {}).setdefault(year, asyncio.Lock())
+
+
+async def _load(year: str | None, paths: [str], executor: Executor | None, *build_args) -> Schedule:
+    loop = asyncio.get_running_loop()
+    async with _year_lock(loop, year):
+        contents = await read_files(paths)
+        schedule = await loop.run_in_executor(executor, build_schedule_from_contents, contents[-1], contents[:-1], *build_args)
+        # Publishing just swaps the registry entry, so until now readers have kept getting the previous schedule
+        register_schedule(schedule)
+        return schedule
+
+
+async def load_schedule_async(schedule_path: str, session_data_paths: [str], placeholder_profile: str | None = None,
+                              executor: Executor | None = None) -> Schedule:
+    """
+    As load_schedule, but without blocking the event loop: the files are read concurrently in worker threads
+    and parsed and built in the executor (by default, the loop's default executor). A process pool keeps
+    the parsing off this process's GIL altogether. The schedule is then registered, replacing any previous
+    schedule for the year in one step
+    """
+    return await _load(None, session_data_paths + [schedule_path], executor, placeholder_profile)
+
+
+async def load_schedule_for_year_async(data_root: str, year: str, cache_dir: str | None = None,
+                                       executor: Executor | None = None) -> Schedule:
+    """
+    As load_schedule_for_year, without blocking the event loop (see load_schedule_async).
+    Concurrent loads of the same year run one after the other
+    """
+    log_info("Loading %s schedule", year)
+    schedule_path, session_data_paths = schedule_paths_for_year(data_root, year)
+    cache_path = schedule_cache_path(cache_dir, year) if cache_dir is not None else None
+    schedule = await _load(str(year), session_data_paths + [schedule_path], executor, None, cache_path)
+    log_info("Loaded")
+    return schedule
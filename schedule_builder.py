@@ -1,15 +1,20 @@
 import datetime
 import os
+from contextlib import ExitStack
 from dataclasses import dataclass
 
-import yaml
-
+from sessionmodel.instrumentation import span, timed
 from sessionmodel.logging import log_info
-from sessionmodel.schedule_model import Session, Timeslot, Schedule, Day, SessionSlot, Time, WorkshopGroup
-from pykyll.utils import format_longdate, dict_merge
-from sessionmodel.Sessions import load_yaml, parse_sessions
+from sessionmodel.schedule_cache import schedule_cache_key, schedule_cache_path, read_cached_schedule, write_cached_schedule
+from sessionmodel.schedule_model import Session, Timeslot, Schedule, Day, SessionSlot, Speaker, Time, WorkshopGroup, RoomGrid
+from sessionmodel.schedule_index import ScheduleIndex
+from sessionmodel.schedule_registry import ScheduleRegistry
+from sessionmodel.schedule_search import SearchIndex
+from pykyll.utils import format_longdate
+from sessionmodel.Sessions import LazySessions, load_yaml, parse_sessions
+from sessionmodel.session_layers import SessionLayers, get_speakers_as_dict, merge_session_data, merge_session_layers
 
-_schedules = {}
+_registry = ScheduleRegistry()
 
 @dataclass
 class ReusableSlug:
@@ -38,7 +43,8 @@ class ScheduleBuilder:
                 start_time=times[0],
                 end_time=times[1])
             session_info.scheduled = True
-            slug = session.slug
+            with span("slugify"):
+                slug = session.slug
             if session_info.reusable:
                 if (reusable_slug := self.reusable_slugs.get(slug)) is None:
                     reusable_slug = ReusableSlug(slug)
@@ -61,10 +67,11 @@ class ScheduleBuilder:
             if not session_slot_data:
                 raise Exception(f"Only 'session_slot' key currently supported, but found: {session_slot_entry.keys()}")
 
-            sessions = [make_session(session_entry["session"], [Time(time) for time in session_entry.get("time")] or times) for session_entry in session_slot_data]
+            entries = [(session_entry["session"], [Time(time) for time in session_entry.get("time")] or times) for session_entry in session_slot_data]
         else:
             # implicit session_slot - just one, full-length, session
-            sessions = [make_session(session_slot_entry, times)]
+            entries = [(session_slot_entry, times)]
+        sessions = [make_session(session_id, session_times) for session_id, session_times in entries]
 
         all_times = set()
         for session in sessions:
@@ -74,11 +81,13 @@ class ScheduleBuilder:
                 all_times.add(session.end_time)
         all_times = sorted(all_times)
 
-        return SessionSlot(index, sessions=sessions, times=all_times)
+        return SessionSlot(index, sessions=sessions, times=all_times,
+                           session_times=[(session_times[0], session_times[1]) for _, session_times in entries])
 
     def read_session_slots(self, session_slot_data, times: [Time], live_data: [int]) -> [SessionSlot]:
         return [self.read_session_slot(index, data, times, live == 1) for index, (data, live) in enumerate(zip(session_slot_data, live_data))]
 
+    @timed("builder.read_timeslots")
     def read_timeslots(self, timeslot_data: [dict]) -> [Timeslot]:
         timeslots = []
         for time_num, data in enumerate(timeslot_data):
@@ -93,20 +102,14 @@ class ScheduleBuilder:
                         times.add(s.start_time)
                     if s.end_time <= rs.times[-1]:
                         times.add(s.end_time)
-            times = list(times)
-            times.sort()
+            times = sorted(times)
+            time_indices = {time: index for index, time in enumerate(times)}
             for rs in session_slots:
-                rs.start_time_index = times.index(rs.times[0])
-                rs.end_time_index = times.index(rs.times[-1])
+                rs.start_time_index = time_indices[rs.times[0]]
+                rs.end_time_index = time_indices[rs.times[-1]]
                 for s in rs.sessions:
-                    try:
-                        s.start_time_index = times.index(s.start_time)
-                    except:
-                        s.start_time_index = 0
-                    try:
-                        s.end_time_index = times.index(s.end_time)
-                    except:
-                        s.end_time_index = len(times)-1
+                    s.start_time_index = time_indices.get(s.start_time, 0)
+                    s.end_time_index = time_indices.get(s.end_time, len(times)-1)
             timeslot = Timeslot(
                 times=times,
                 type=data.get("type") or "sessions",
@@ -115,6 +118,7 @@ class ScheduleBuilder:
             timeslots.append(timeslot)
         return timeslots
 
+    @timed("builder.read_days")
     def read_days(self, day_data) -> [Day]:
         days = []
         for data in day_data:
@@ -133,6 +137,7 @@ class ScheduleBuilder:
                 label=data.get("label") or "",
                 alt_label=data.get("alt_label") or "",
                 timeslots = self.read_timeslots(data["timeslots"]))
+            day.grid = RoomGrid(day.rooms, day.timeslots)
 
             for timeslot in day.timeslots:
                 session_count = len(timeslot.session_slots)
@@ -144,102 +149,119 @@ class ScheduleBuilder:
         return days
 
 
-def get_speakers_as_dict(session: dict) -> {str: dict}:
-    if speakers := session.get("speakers"):
-        return {speaker["id"]: speaker for speaker in speakers}
-    else:
-        return {}
-
-
-def load_session_data(paths: [str]) -> {str: Session}:
-    all_session_data = {}
-    for path in paths:
-        session_data = load_yaml(path)
-        for session in session_data:
-            if (session_id := session.get("id")) is None:
-                raise Exception(f"session data has no ID:\n{session}")
-            if existing_session := all_session_data.get(session_id):
-                existing_speakers = get_speakers_as_dict(existing_session)
-                new_speakers = get_speakers_as_dict(session)
-                speakers = dict_merge(existing_speakers, new_speakers)
-                session = dict_merge(existing_session, session)
-                if speakers:
-                    session["speakers"] = [s for s in speakers.values()]
-            all_session_data[session_id] = session
-
+@timed("load_session_data")
+def load_session_data(paths: [str], lazy: bool = False) -> {str: Session}:
+    """
+    Loads and merges the session data files, in order, into Sessions by id.
+    If lazy, returns a LazySessions, which only merges and parses each session when it is first looked up
+    """
+    if lazy:
+        # The layers are private to the LazySessions, so parsing can work on the merged data in place
+        return LazySessions(SessionLayers.from_files(paths))
+    all_session_data = merge_session_layers([load_yaml(path) for path in paths])
     return {session.id: session for session in parse_sessions(all_session_data.values())}
 
 
-def load_schedule(schedule_path: str | None, session_data_paths: [str], placeholder_profile: str | None = None) -> Schedule | None:
-    session_data_by_id = load_session_data(session_data_paths)
-
+def collect_speakers(session_data_by_id: dict, placeholder_profile: str | None = None) -> dict:
+    """
+    Returns the speakers from all sessions by id (the first session a speaker appears in wins)
+    """
     all_speakers = {}
-
     for session in session_data_by_id.values():
         for speaker in session.speakers:
             if speaker.id not in all_speakers:
                 all_speakers[speaker.id] = speaker
                 if speaker.profile_pic is None:
                     speaker.profile_pic = placeholder_profile
-
+    return all_speakers
+
+
+def link_day_sessions(schedule: Schedule, day: Day):
+    """
+    Fills in the schedule, day, room and track of each session on a day
+    (and puts co-presented sessions' lead presenter first)
+    """
+    for timeslot in day.timeslots:
+        for session_slots in timeslot.session_slots:
+            room = schedule.room_names[day.rooms[session_slots.index]]
+            for session in session_slots.sessions:
+                session.schedule = schedule
+                session.day.append(day)
+                session.room = room
+                if session.data.track:
+                    session.track = schedule.tracks[session.data.track]
+                if speakers := session.data.speakers:
+                    if len(speakers) > 1:
+                        speakers.sort(key=lambda s: s.id != session.data.lead_presenter)
+
+
+def build_workshop_groups(days: [Day]) -> [WorkshopGroup]:
+    """
+    Groups the workshops on the given days by date range, in the order they are first scheduled
+    """
+    workshops_seen = set()
+    workshop_groups = {}
+    for day in days:
+        for timeslot in day.timeslots:
+            for session_slots in timeslot.session_slots:
+                for workshop in session_slots.sessions:
+                    if workshop.is_workshop and workshop.id not in workshops_seen:
+                        workshops_seen.add(workshop.id)
+                        date_range = workshop.date_range
+                        if date_range not in workshop_groups:
+                            workshop_groups[date_range] = WorkshopGroup(workshop.day[0].alt_label, date_range, [])
+                        workshop_groups[date_range].workshops.append(workshop)
+    return list(workshop_groups.values())
+
+
+@timed("build_schedule")
+def build_schedule(data: dict, session_data_by_id: {str: Session}, speakers_by_id: dict) -> Schedule:
+    """
+    Builds a schedule from the (parsed) contents of a schedule file and the session data it refers to.
+    speakers_by_id holds speaker data (see collect_speakers) - the schedule gets one Speaker for each
+    """
     builder = ScheduleBuilder(session_data_by_id)
-
-    if schedule_path is None:
-        return None
-
-    with open(schedule_path, 'r') as f:
-        data = yaml.safe_load(f)
-
-    year = data["year"]
     schedule = Schedule(
-        year=year,
+        year=data["year"],
         room_names=data["room_names"],
         default_header=data.get("default_header"),
         days=builder.read_days(data["days"]),
         tracks=data.get("tracks") or {},
         sessions_by_slug=builder.session_by_slug,
         all_sessions_by_id=session_data_by_id,
-        speakers_by_id=all_speakers)
+        speakers_by_id={speaker_id: Speaker(speaker) for speaker_id, speaker in speakers_by_id.items()})
+
+    with span("link_sessions"):
+        for day in schedule.days:
+            link_day_sessions(schedule, day)
+        schedule.workshop_groups = build_workshop_groups(schedule.days)
+    with span("build_indexes"):
+        schedule.index = ScheduleIndex(schedule.sessions_by_slug.values())
+        schedule.search_index = SearchIndex(schedule)
+    return schedule
 
-    workshops_seen = set()
-    workshops = []
-    for day in schedule.days:
-        for timeslot in day.timeslots:
-            for session_slots in timeslot.session_slots:
-                room = schedule.room_names[day.rooms[session_slots.index]]
-                for session in session_slots.sessions:
-                    session.schedule = schedule
-                    session.day.append(day)
-                    session.room = room
-                    if session.is_workshop:
-                        if session.id not in workshops_seen:
-                            workshops_seen.add(session.id)
-                            workshops.append(session)
-                    if session.data.track:
-                        session.track = schedule.tracks[session.data.track]
-                    if speakers := session.data.speakers:
-                        if len(speakers) > 1:
-                            speakers.sort(key=lambda s: s.id != session.data.lead_presenter)
 
-    workshop_groups = {}
-    for workshop in workshops:
-        date_range = workshop.date_range
-        if date_range not in workshop_groups:
-            workshop_groups[date_range] = []
-        workshop_groups[date_range].append(workshop)
-    for date_range, grouped_workshops in workshop_groups.items():
-        group = WorkshopGroup(grouped_workshops[0].day[0].alt_label, date_range, [])
-        schedule.workshop_groups.append(group)
-        for workshop in grouped_workshops:
-            group.workshops.append(workshop)
-
-    _schedules[str(year)] = schedule
-    return schedule
+def register_schedule(schedule: Schedule):
+    _registry.publish(schedule)
+
 
+@timed("load_schedule")
+def load_schedule(schedule_path: str | None, session_data_paths: [str], placeholder_profile: str | None = None) -> Schedule | None:
+    session_data_by_id = load_session_data(session_data_paths)
+    all_speakers = collect_speakers(session_data_by_id, placeholder_profile)
 
-def load_schedule_for_year(data_root: str, year: str):
-    log_info(f"Loading {year} schedule")
+    if schedule_path is None:
+        return None
 
+    schedule = build_schedule(load_yaml(schedule_path), session_data_by_id, all_speakers)
+    register_schedule(schedule)
+    return schedule
+
+
+def schedule_paths_for_year(data_root: str, year: str) -> tuple[str, list[str]]:
+    """
+    The schedule path, and session data paths, for a year in the standard layout under data_root
+    """
     session_data_paths = [
         os.path.join(data_root, path)
         for path in [
@@ -247,17 +269,86 @@ def load_schedule_for_year(data_root: str, year: str):
             f"{year}/session_data.yml",
             f"{year}/session_data_overrides.yml",
         ]]
+    return os.path.join(data_root, f"{year}/schedule.yml"), session_data_paths
+
+
+def _load_schedule_for_year(data_root: str, year: str, cache_dir: str | None = None) -> Schedule:
+    log_info("Loading %s schedule", year)
+
+    schedule_path, session_data_paths = schedule_paths_for_year(data_root, year)
 
-    load_schedule(
-        schedule_path=os.path.join(data_root, f"{year}/schedule.yml"),
+    cache_path = cache_key = None
+    if cache_dir is not None:
+        cache_path = schedule_cache_path(cache_dir, year)
+        cache_key = schedule_cache_key(session_data_paths + [schedule_path])
+        if schedule := read_cached_schedule(cache_path, cache_key):
+            register_schedule(schedule)
+            log_info("Loaded from cache")
+            return schedule
+
+    schedule = load_schedule(
+        schedule_path=schedule_path,
         session_data_paths=session_data_paths)
+    if cache_path is not None:
+        write_cached_schedule(cache_path, cache_key, schedule)
     log_info("Loaded")
+    return schedule
+
+
+def load_schedule_for_year(data_root: str, year: str, cache_dir: str | None = None) -> Schedule:
+    """
+    Loads the schedule for the given year from the standard layout under data_root.
+    If cache_dir is given the built schedule is cached there, keyed by the content of the
+    input files and the code that builds it, and reused on subsequent loads for as long as
+    neither changes
+    """
+    with _registry.loading(year):
+        return _load_schedule_for_year(data_root, year, cache_dir)
+
+
+def ensure_schedule_for_year(data_root: str, year: str, cache_dir: str | None = None) -> Schedule:
+    """
+    As load_schedule_for_year, but only loads the year if it has not already been loaded
+    (and, if another thread is loading it, waits for that load instead)
+    """
+    return _registry.load_once(year, lambda: _load_schedule_for_year(data_root, year, cache_dir))
+
+
+def load_schedules_for_years(data_root: str, years: [str], cache_dir: str | None = None, max_workers: int | None = None) -> {str: Schedule}:
+    """
+    Loads the schedules for several years concurrently, each in its own process,
+    and registers them as they arrive. Returns the schedules by year
+    """
+    from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing, so only imported when needed
+    schedules = {}
+    with ExitStack() as stack:
+        for year in years:
+            stack.enter_context(_registry.loading(year))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {year: executor.submit(_load_schedule_for_year, data_root, year, cache_dir) for year in years}
+            for year, future in futures.items():
+                schedule = future.result()
+                register_schedule(schedule)
+                schedules[str(year)] = schedule
+    return schedules
+
+
+def resolve_slug(slug: str, year=None) -> tuple[str, Session] | None:
+    """
+    Returns (year, session) for a session slug, from the schedules loaded so far - in the given year,
+    or else the latest year with that slug - or None if no loaded schedule has it
+    """
+    return _registry.slugs.resolve(slug, year)
 
 
 def get_schedule(year: int) -> Schedule:
-    if schedule := _schedules.get(str(year)):
+    """
+    Returns the schedule for the year. If it is being loaded, this waits for the load to finish.
+    If it has not been loaded at all an empty schedule is returned
+    """
+    if schedule := _registry.get(year):
         return schedule
-    empty_schedule = Schedule(
+    return Schedule(
         year=year,
         room_names=[],
         default_header=None,
@@ -266,5 +357,3 @@ def get_schedule(year: int) -> Schedule:
         sessions_by_slug={},
         all_sessions_by_id={},
         speakers_by_id={})
-    _schedules[str(year)] = empty_schedule
-    return empty_schedule
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import pickle
+
+from sessionmodel.logging import log_info, log_warn
+from sessionmodel.schedule_model import Schedule
+
+# Keys also include code_fingerprint(), so changes to the code are picked up without this.
+# It is an extra salt, e.g. for forcing every cache to be rebuilt
+CACHE_VERSION = 8
+
+# Modules (besides sessionmodel's own) whose output ends up in a built schedule
+FINGERPRINTED_MODULES = ["pykyll.html", "pykyll.utils", "objectipy"]
+
+_code_fingerprint = None
+
+
+def _module_sources(name: str) -> list[str]:
+    import importlib.util
+    try:
+        spec = importlib.util.find_spec(name)
+    except ImportError:
+        return []
+    if spec is None:
+        return []
+    if spec.submodule_search_locations:
+        return sorted(os.path.join(location, filename) for location in spec.submodule_search_locations
+                      for filename in os.listdir(location) if filename.endswith(".py"))
+    return [spec.origin] if spec.origin and spec.origin.endswith(".py") else []
+
+
+def code_fingerprint() -> str:
+    """
+    A hash of the source of sessionmodel's modules and of FINGERPRINTED_MODULES - everything that
+    decides what a schedule built from the same input files looks like. Worked out once per process
+    """
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        paths = sorted(os.path.join(package_dir, filename) for filename in os.listdir(package_dir) if filename.endswith(".py"))
+        for name in FINGERPRINTED_MODULES:
+            paths += _module_sources(name)
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as f:
+                content = f.read()
+            digest.update(os.path.basename(path).encode("utf-8"))
+            digest.update(len(content).to_bytes(8, "little"))
+            digest.update(content)
+        _code_fingerprint = digest.hexdigest()
+    return _code_fingerprint
+
+
+def schedule_cache_key(paths: [str]) -> str:
+    """
+    Returns a key for a schedule built from the given input files.
+    The key covers the content of every file (in order), the code that builds the schedule
+    (see code_fingerprint) and the cache version
+    """
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    return schedule_cache_key_for_contents(contents)
+
+
+def schedule_cache_key_for_contents(contents: [bytes]) -> str:
+    """
+    As schedule_cache_key, for input files that have already been read
+    """
+    digest = hashlib.sha256(f"sessionmodel-schedule:{CACHE_VERSION}:{code_fingerprint()}".encode())
+    for content in contents:
+        digest.update(len(content).to_bytes(8, "little"))
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def schedule_cache_path(cache_dir: str, year: str) -> str:
+    return os.path.join(cache_dir, f"schedule-{year}.pickle")
+
+
+def read_cached_schedule(cache_path: str, key: str) -> Schedule | None:
+    """
+    Returns the schedule stored at cache_path if it was built with the given key, otherwise None
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            # The key is pickled separately, ahead of the schedule, so a stale
+            # cache can be rejected without unpickling the whole schedule
+            if pickle.load(f) != key:
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log_warn("Ignoring unreadable schedule cache, %s: %s", cache_path, e)
+        return None
+
+
+def write_cached_schedule(cache_path: str, key: str, schedule: Schedule):
+    """
+    Stores a built schedule at cache_path under the given key.
+    The file is written to a temporary file first, then moved into place,
+    so concurrent readers never see a partially written cache
+    """
+    import tempfile  # only needed when writing, so not imported up front
+    cache_dir = os.path.dirname(cache_path) or "."
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(schedule, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    log_info("Wrote schedule cache, %s", cache_path)
@@ -0,0 +1,69 @@
+import heapq
+from dataclasses import dataclass
+from typing import Any
+
+from sessionmodel.schedule_model import Day, Session, Time
+
+
+@dataclass
+class Conflict:
+    kind: str  # "speaker" or "room"
+    key: Any  # the speaker id, or room (name if room names were given, otherwise number)
+    day: Day
+    first: Session
+    second: Session
+    first_times: tuple[Time, Time]  # when each session was on, where they overlapped
+    second_times: tuple[Time, Time]
+
+    def __str__(self):
+        return (f"{self.kind} {self.key} is double booked on {self.day.day}: "
+                f"'{self.first.slug}' ({self.first_times[0]}-{self.first_times[1]}) overlaps "
+                f"'{self.second.slug}' ({self.second_times[0]}-{self.second_times[1]})")
+
+
+def _overlaps(placements: list, kind: str, key, day: Day, conflicts: list):
+    """
+    Sweeps over (start, end, session) placements, in start order, keeping a heap of the
+    placements still running. Anything still running when a placement starts overlaps it
+    """
+    placements.sort(key=lambda placement: placement[0].minutes)
+    running = []
+    for order, (start, end, session) in enumerate(placements):
+        while running and running[0][0] <= start.minutes:
+            heapq.heappop(running)
+        for _, _, (other_start, other_end, other) in running:
+            if other is not session:
+                conflicts.append(Conflict(kind, key, day, other, session, (other_start, other_end), (start, end)))
+        heapq.heappush(running, (end.minutes, order, (start, end, session)))
+
+
+def find_conflicts(days: [Day], room_names: list[str] | None = None) -> [Conflict]:
+    """
+    Finds speakers, and rooms, booked for overlapping sessions on the same day.
+    Each day is checked with a sweep over its sessions grouped by speaker and by room, so this
+    takes O(n log n) time (plus the number of conflicts found).
+    A session is placed once for each timeslot it is in, at its times in that slot - so the gaps
+    between the slots of a multi session are free - and a lone session (e.g. a keynote or break)
+    is placed in every room, as in Day.grid
+    """
+    conflicts = []
+    for day in days:
+        rooms = [room_names[room] for room in day.rooms] if room_names else day.rooms
+        by_room = {}
+        by_speaker = {}
+        for timeslot in day.timeslots:
+            for session_slot in timeslot.session_slots:
+                slot_rooms = rooms if timeslot.is_trackless else [rooms[session_slot.index]]
+                for session in session_slot.sessions:
+                    start, end = session_slot.times_of(session)
+                    placement = (start, end, session)
+                    for room in slot_rooms:
+                        by_room.setdefault(room, []).append(placement)
+                    for speaker in session.data.speakers:
+                        by_speaker.setdefault(speaker.id, []).append(placement)
+
+        for room, placements in by_room.items():
+            _overlaps(placements, "room", room, day, conflicts)
+        for speaker_id, placements in by_speaker.items():
+            _overlaps(placements, "speaker", speaker_id, day, conflicts)
+    return conflicts
@@ -0,0 +1,171 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from sessionmodel.instrumentation import timed
+from sessionmodel.schedule_model import Schedule, Session
+from sessionmodel.serialization import to_data
+
+
+def session_key(session: Session) -> str:
+    """
+    What identifies a session between versions of a schedule: its data id, or for reusable
+    sessions (which share an id), its numbered slug
+    """
+    return session.slug if session.data.reusable else session.id
+
+
+def content_hash(data) -> str:
+    """
+    A hash of a model object's serialized fields (as save_sessions would write them)
+    """
+    return hashlib.sha256(json.dumps(to_data(data), sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _placement(session: Session) -> tuple:
+    return tuple(day.date for day in session.day), session.start_time, session.end_time, session.room
+
+
+def _time_desc(session: Session) -> str:
+    return f"{', '.join(day.day for day in session.day)} {session.start_time}-{session.end_time}"
+
+
+@dataclass
+class SessionChange:
+    """
+    How one session differs between two versions of a schedule
+    """
+    key: str
+    old: Session
+    new: Session
+    retimed: bool = False  # days, start or end time changed
+    re_roomed: bool = False
+    retitled: bool = False
+    speakers_added: list = field(default_factory=list)  # speaker ids
+    speakers_removed: list = field(default_factory=list)
+    changed_fields: list[str] = field(default_factory=list)  # of the session data
+
+    def describe(self) -> list[str]:
+        title = self.new.data.title
+        lines = []
+        if self.retimed:
+            lines.append(f"Retimed: {title}: {_time_desc(self.old)} -> {_time_desc(self.new)}")
+        if self.re_roomed:
+            lines.append(f"Moved: {title}: {self.old.room} -> {self.new.room}")
+        if self.retitled:
+            lines.append(f"Retitled: {self.old.data.title} -> {title}")
+        if self.speakers_added or self.speakers_removed:
+            lines.append(f"Speakers changed: {title}: {self.old.speaker_names or '-'} -> {self.new.speaker_names or '-'}")
+        if other := [name for name in self.changed_fields if name not in ("title", "speakers")]:
+            lines.append(f"Updated: {title}: {', '.join(other)}")
+        return lines
+
+
+@dataclass
+class ScheduleDiff:
+    added: list[Session] = field(default_factory=list)  # scheduled sessions, in the new schedule
+    removed: list[Session] = field(default_factory=list)  # scheduled sessions, in the old schedule
+    changed: list[SessionChange] = field(default_factory=list)
+    speakers_added: list = field(default_factory=list)  # ids of speakers only in the new schedule
+    speakers_removed: list = field(default_factory=list)  # ids of speakers only in the old schedule
+    speakers_updated: list = field(default_factory=list)  # ids of speakers whose data (e.g. bio) changed
+
+    @property
+    def retimed(self) -> list[SessionChange]:
+        return [change for change in self.changed if change.retimed]
+
+    @property
+    def re_roomed(self) -> list[SessionChange]:
+        return [change for change in self.changed if change.re_roomed]
+
+    @property
+    def retitled(self) -> list[SessionChange]:
+        return [change for change in self.changed if change.retitled]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed
+                    or self.speakers_added or self.speakers_removed or self.speakers_updated)
+
+    def affected_speakers(self) -> dict:
+        """
+        Speaker id -> descriptions of the changes to their sessions (e.g. for letting them know)
+        """
+        affected = {}
+        for session in self.added:
+            for speaker in session.data.speakers:
+                affected.setdefault(speaker.id, []).append(f"Added: {session.data.title} ({_time_desc(session)}, {session.room})")
+        for session in self.removed:
+            for speaker in session.data.speakers:
+                affected.setdefault(speaker.id, []).append(f"Removed: {session.data.title}")
+        for change in self.changed:
+            if lines := change.describe():
+                speaker_ids = {speaker.id for speaker in change.old.data.speakers} | {speaker.id for speaker in change.new.data.speakers}
+                for speaker_id in speaker_ids:
+                    affected.setdefault(speaker_id, []).extend(lines)
+        return affected
+
+    def describe(self) -> list[str]:
+        lines = [f"Added: {session.data.title} ({_time_desc(session)}, {session.room})" for session in self.added]
+        lines += [f"Removed: {session.data.title}" for session in self.removed]
+        for change in self.changed:
+            lines += change.describe()
+        return lines
+
+    def __str__(self):
+        return "\n".join(self.describe())
+
+
+def _scheduled_by_key(schedule: Schedule) -> dict:
+    return {session_key(session): session for session in schedule.sessions_by_slug.values()}
+
+
+@timed("diff_schedules")
+def diff_schedules(old: Schedule, new: Schedule) -> ScheduleDiff:
+    """
+    Compares two versions of a schedule (e.g. a newly loaded one against a cached one), session by
+    session. Sessions whose placement and content hash match are skipped without comparing any further
+    """
+    diff = ScheduleDiff()
+    old_sessions = _scheduled_by_key(old)
+    new_sessions = _scheduled_by_key(new)
+
+    diff.removed = [session for key, session in old_sessions.items() if key not in new_sessions]
+    # Hashes are per session data, which multi-day and reusable sessions share, so only hash each once
+    hashes = {}
+
+    def hash_of(session: Session) -> str:
+        if (digest := hashes.get(id(session.data))) is None:
+            digest = hashes[id(session.data)] = content_hash(session.data)
+        return digest
+
+    for key, new_session in new_sessions.items():
+        if (old_session := old_sessions.get(key)) is None:
+            diff.added.append(new_session)
+            continue
+        old_placement, new_placement = _placement(old_session), _placement(new_session)
+        if old_placement == new_placement and hash_of(old_session) == hash_of(new_session):
+            continue
+
+        old_data, new_data = old_session.data, new_session.data
+        change = SessionChange(key, old_session, new_session)
+        change.retimed = old_placement[:3] != new_placement[:3]
+        change.re_roomed = old_placement[3] != new_placement[3]
+        change.retitled = old_data.title != new_data.title
+        old_speakers = [speaker.id for speaker in old_data.speakers]
+        new_speakers = [speaker.id for speaker in new_data.speakers]
+        change.speakers_added = [speaker_id for speaker_id in new_speakers if speaker_id not in old_speakers]
+        change.speakers_removed = [speaker_id for speaker_id in old_speakers if speaker_id not in new_speakers]
+        if hash_of(old_session) != hash_of(new_session):
+            old_fields, new_fields = to_data(old_data), to_data(new_data)
+            change.changed_fields = [name for name in dict.fromkeys([*old_fields, *new_fields])
+                                     if old_fields.get(name) != new_fields.get(name)]
+        diff.changed.append(change)
+
+    for speaker_id, new_speaker in new.speakers_by_id.items():
+        if (old_speaker := old.speakers_by_id.get(speaker_id)) is None:
+            diff.speakers_added.append(speaker_id)
+        elif content_hash(old_speaker.data) != content_hash(new_speaker.data):
+            diff.speakers_updated.append(speaker_id)
+    diff.speakers_removed = [speaker_id for speaker_id in old.speakers_by_id if speaker_id not in new.speakers_by_id]
+    return diff
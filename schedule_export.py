@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sessionmodel.instrumentation import count, span, timed
+from sessionmodel.logging import log_info
+from sessionmodel.schedule_model import Day, Schedule, Session, Speaker
+from sessionmodel.serialization import to_data
+
+MANIFEST_NAME = ".export-manifest.json"
+
+
+@dataclass
+class ExportResult:
+    """
+    What export_schedule did. Paths are relative to the output directory
+    """
+    written: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f"{len(self.written)} written, {self.unchanged} unchanged, {len(self.removed)} removed"
+
+
+def session_document(session: Session) -> dict:
+    data = session.data
+    return {
+        "slug": session.slug,
+        "id": session.id,
+        "type": data.type,
+        "title": data.title,
+        "title_html": session.title_as_html,
+        "abstract_html": session.abstract_as_html,
+        "outline_html": session.outline_as_html if data.outline else None,
+        "length": data.length,
+        "audience": data.audience,
+        "tags": data.tags,
+        "track": data.track,
+        "room": session.room,
+        "dates": [day.date.isoformat() for day in session.day],
+        "start_time": str(session.start_time),
+        "end_time": str(session.end_time),
+        "speakers": [speaker.id for speaker in session.speakers],
+    }
+
+
+def speaker_document(schedule: Schedule, speaker: Speaker) -> dict:
+    document = to_data(speaker.data)
+    document["bio_html"] = speaker.bio_as_html
+    document["sessions"] = [session.slug for session in schedule.index.by_speaker(speaker.id)]
+    return document
+
+
+def day_document(schedule: Schedule, day: Day) -> dict:
+    return {
+        "day_num": day.day_num,
+        "day": day.day,
+        "date": day.date.isoformat(),
+        "type": day.type,
+        "label": day.label,
+        "rooms": [schedule.room_names[room] for room in day.rooms],
+        "timeslots": [
+            {
+                "times": [str(time) for time in timeslot.times],
+                "type": timeslot.type,
+                "sessions": [[session.slug for session in session_slot.sessions] for session_slot in timeslot.session_slots]
+            }
+            for timeslot in day.timeslots]
+    }
+
+
+def schedule_document(schedule: Schedule) -> dict:
+    return {
+        "year": schedule.year,
+        "room_names": schedule.room_names,
+        "days": [{"day_num": day.day_num, "day": day.day, "date": day.date.isoformat()} for day in schedule.days],
+        "sessions": list(schedule.sessions_by_slug),
+        "speakers": list(schedule.speakers_by_id),
+    }
+
+
+def iter_documents(schedule: Schedule) -> Iterator[tuple[str, dict]]:
+    """
+    Yields (relative path, document) for every document exported for a schedule:
+        schedule.json, days/<day_num>.json, sessions/<slug>.json and speakers/<id>.json
+    """
+    yield "schedule.json", schedule_document(schedule)
+    for day in schedule.days:
+        yield f"days/{day.day_num}.json", day_document(schedule, day)
+    for slug, session in schedule.sessions_by_slug.items():
+        yield f"sessions/{slug}.json", session_document(session)
+    for speaker_id, speaker in schedule.speakers_by_id.items():
+        yield f"speakers/{speaker_id}.json", speaker_document(schedule, speaker)
+
+
+def _read_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_file(path: str, content: bytes):
+    """
+    Writes via a temporary file, so readers never see a partially written document
+    """
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+@timed("export_schedule")
+def export_schedule(schedule: Schedule, out_dir: str, max_workers: int | None = None) -> ExportResult:
+    """
+    Writes the JSON documents for a schedule (see iter_documents) under out_dir.
+    The hash of each document is kept in a manifest in out_dir, and only documents whose content
+    changed since the last export (or whose file is missing) are written - in parallel.
+    Documents that are no longer produced (e.g. of removed sessions) are deleted
+    """
+    previous = _read_manifest(out_dir)
+    manifest = {}
+    to_write = []
+    result = ExportResult()
+    with span("export.encode"):
+        for path, document in iter_documents(schedule):
+            content = json.dumps(document, ensure_ascii=False, indent=1).encode("utf-8")
+            digest = hashlib.sha256(content).hexdigest()
+            manifest[path] = digest
+            full_path = os.path.join(out_dir, path)
+            if previous.get(path) == digest and os.path.exists(full_path):
+                result.unchanged += 1
+            else:
+                to_write.append((full_path, content))
+                result.written.append(path)
+
+    with span("export.write"):
+        for directory in {os.path.dirname(full_path) for full_path, _ in to_write} | {out_dir}:
+            os.makedirs(directory, exist_ok=True)
+        with ThreadPoolExecutor(max_workers) as executor:
+            # list() so any exception is raised here
+            list(executor.map(lambda item: _write_file(*item), to_write))
+        for path in previous.keys() - manifest.keys():
+            try:
+                os.remove(os.path.join(out_dir, path))
+            except FileNotFoundError:
+                pass
+            result.removed.append(path)
+        # The manifest goes last, so an interrupted export is just redone next time
+        _write_file(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+    count("export.written", len(result.written))
+    count("export.unchanged", result.unchanged)
+    log_info("Exported %s schedule to %s: %s", schedule.year, out_dir, result)
+    return result
@@ -0,0 +1,192 @@
+import datetime
+import os
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from sessionmodel.instrumentation import count, timed
+from sessionmodel.schedule_model import Day, Schedule, Session, Time
+from sessionmodel.slug_registry import slugify_cached
+
+# Lines longer than this many octets are folded (RFC 5545, 3.1)
+MAX_LINE_OCTETS = 75
+
+
+@dataclass
+class Event:
+    """
+    One VEVENT - a session on one day (a multi-day session has an event for each of its days)
+    """
+    uid: str
+    session: Session
+    day: Day
+    text: str  # the formatted VEVENT, folded and CRLF terminated
+    rooms: list[str] = field(default_factory=list)  # names of the rooms it is in that day (every room, for a lone session)
+
+
+def escape_text(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold_line(line: str) -> str:
+    """
+    Folds a content line into lines of at most MAX_LINE_OCTETS octets (not splitting UTF-8 sequences),
+    each terminated by CRLF, with continuation lines starting with a space
+    """
+    if len(line.encode("utf-8")) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    current = []
+    size = 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > limit:
+            parts.append("".join(current))
+            current = []
+            size = 0
+            limit = MAX_LINE_OCTETS - 1  # allowing for the leading space
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _format_datetime(date: datetime.date, time) -> str:
+    return f"{date:%Y%m%d}T{time.hour:02d}{time.min:02d}00"
+
+
+def format_event(schedule: Schedule, session: Session, day: Day, uid: str, stamp: str, tzid: str | None = None,
+                 url_format: str | None = None, times: tuple[Time, Time] | None = None) -> str:
+    """
+    times are when the session is on that day - by default, its start_time and end_time
+    """
+    data = session.data
+    start_time, end_time = times or (session.start_time, session.end_time)
+    time_param = f";TZID={tzid}" if tzid else ""
+    description = data.abstract or ""
+    if names := session.speaker_names:
+        description = f"{names}\n\n{description}"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART{time_param}:{_format_datetime(day.date, start_time)}",
+        f"DTEND{time_param}:{_format_datetime(day.date, end_time)}",
+        f"SUMMARY:{escape_text(session.title_prefix + data.title)}",
+        f"DESCRIPTION:{escape_text(description)}",
+    ]
+    if session.room:
+        lines.append(f"LOCATION:{escape_text(session.room)}")
+    if categories := [escape_text(tag) for tag in data.tags or []]:
+        lines.append(f"CATEGORIES:{','.join(categories)}")
+    if url_format:
+        lines.append(f"URL:{url_format.format(slug=session.slug, year=schedule.year)}")
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+def iter_events(schedule: Schedule, include_breaks: bool = False, tzid: str | None = None,
+                url_format: str | None = None, domain: str = "sessionmodel",
+                stamp: datetime.datetime | None = None) -> Iterator[Event]:
+    """
+    Yields an Event for each session on each day, in schedule order, in a single pass over the schedule.
+    Each day's event runs from the start of the session's first slot that day to the end of its last.
+    UIDs are <year>-<slug>-<date>@<domain>, so they stay the same from one export to the next.
+    Times are local ("floating") unless a tzid is given. The DTSTAMP defaults to midnight (UTC)
+    at the start of the first day, so the output only changes when the schedule does.
+    url_format, if given, is formatted with slug and year, e.g. "https://example.com/{year}/{slug}"
+    """
+    if stamp is None:
+        first_date = schedule.days[0].date if schedule.days else datetime.date(int(schedule.year), 1, 1)
+        stamp = datetime.datetime.combine(first_date, datetime.time())
+    stamp_str = f"{stamp:%Y%m%dT%H%M%S}Z"
+    for day in schedule.days:
+        day_rooms = [schedule.room_names[room] for room in day.rooms]
+        # A session appears in every slot it is in, but gets one event per day:
+        # id(session) -> [session, start, end, {room name: None}]
+        day_sessions = {}
+        for timeslot in day.timeslots:
+            for session_slot in timeslot.session_slots:
+                # A lone session (e.g. a keynote or break) is in every room, as in Day.grid
+                slot_rooms = day_rooms if timeslot.is_trackless else [day_rooms[session_slot.index]]
+                for session in session_slot.sessions:
+                    if session.is_break and not include_breaks:
+                        continue
+                    start, end = session_slot.times_of(session)
+                    if (entry := day_sessions.get(id(session))) is None:
+                        entry = day_sessions[id(session)] = [session, start, end, {}]
+                    else:
+                        entry[1] = min(entry[1], start)
+                        entry[2] = max(entry[2], end)
+                    entry[3].update(dict.fromkeys(slot_rooms))
+        for session, start, end, rooms in day_sessions.values():
+            uid = f"{schedule.year}-{session.slug}-{day.date:%Y%m%d}@{domain}"
+            count("ical.events")
+            yield Event(uid, session, day,
+                        format_event(schedule, session, day, uid, stamp_str, tzid, url_format, (start, end)),
+                        list(rooms))
+
+
+def feed_names(event: Event) -> Iterator[str]:
+    """
+    The feeds an event belongs in: "all", plus "rooms/<room>" (for each of the event's rooms),
+    "tracks/<track>" and "speakers/<id>". Room names and tracks are slugified, as they become file names
+    """
+    yield "all"
+    session = event.session
+    for room in event.rooms:
+        yield f"rooms/{slugify_cached(room)}"
+    if track := session.data.track:
+        yield f"tracks/{slugify_cached(track)}"
+    for speaker in session.data.speakers:
+        yield f"speakers/{speaker.id}"
+
+
+def collect_feeds(events: Iterable[Event]) -> dict[str, list[Event]]:
+    """
+    Distributes events into feeds (see feed_names) - each event is formatted once, however many feeds it is in
+    """
+    feeds = {}
+    for event in events:
+        for name in feed_names(event):
+            feeds.setdefault(name, []).append(event)
+    return feeds
+
+
+def iter_calendar(events: Iterable[Event], name: str | None = None) -> Iterator[str]:
+    """
+    Streams a VCALENDAR holding the events, as chunks of text
+    """
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//sessionmodel//schedule//EN\r\nCALSCALE:GREGORIAN\r\n"
+    if name:
+        yield fold_line(f"X-WR-CALNAME:{escape_text(name)}")
+    for event in events:
+        yield event.text
+    yield "END:VCALENDAR\r\n"
+
+
+def format_calendar(events: Iterable[Event], name: str | None = None) -> str:
+    return "".join(iter_calendar(events, name))
+
+
+def write_calendar(filename: str, events: Iterable[Event], name: str | None = None):
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        for chunk in iter_calendar(events, name):
+            f.write(chunk)
+
+
+@timed("export_calendars")
+def export_calendars(schedule: Schedule, out_dir: str, **options) -> list[str]:
+    """
+    Writes all.ics, plus an .ics file per room, track and speaker (under rooms/, tracks/ and speakers/)
+    to out_dir, from one pass over the schedule. options are passed on to iter_events.
+    Returns the paths written
+    """
+    paths = []
+    for feed_name, events in collect_feeds(iter_events(schedule, **options)).items():
+        path = os.path.join(out_dir, f"{feed_name}.ics")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_calendar(path, events, f"{schedule.year}" if feed_name == "all" else f"{schedule.year} {feed_name}")
+        paths.append(path)
+    return paths
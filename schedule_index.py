@@ -0,0 +1,117 @@
+from typing import Iterable
+
+from sessionmodel.schedule_model import Session
+
+
+class ScheduleIndex:
+    """
+    Secondary indexes over the scheduled sessions of a schedule:
+    speaker id, tag, track (key), room (name) and audience -> sessions.
+    Results are always returned in schedule order (day, start time, then room)
+    """
+    kinds = ("speaker", "tag", "track", "room", "audience")
+
+    def __init__(self, sessions: Iterable[Session] = ()):
+        self._indexes = {kind: {} for kind in self.kinds}  # kind -> value -> {id(session): session}
+        self._order = {}  # id(session) -> sort key
+        self._sessions = {}  # id(session) -> session
+        for session in sessions:
+            self.add(session)
+
+    def __getstate__(self):
+        # Everything is keyed by object id, so only the sessions (and their sort keys) are pickled,
+        # and the indexes are rebuilt on load. The sort keys are kept because they depend on the
+        # schedule, which is still being unpickled at that point
+        return [(session, self._order[id(session)]) for session in self._sessions.values()]
+
+    def __setstate__(self, state):
+        self.__init__()
+        for session, sort_key in state:
+            self._add(session, sort_key)
+
+    @staticmethod
+    def _values(session: Session, kind: str) -> list:
+        data = session.data
+        match kind:
+            case "speaker":
+                return [speaker.id for speaker in data.speakers]
+            case "tag":
+                return data.tags or []
+            case "track":
+                return [data.track] if data.track else []
+            case "room":
+                return [session.room] if session.room else []
+            case "audience":
+                return data.audience or []
+
+    @staticmethod
+    def _sort_key(session: Session) -> tuple:
+        day_num = session.day[0].day_num if session.day else -1
+        room_names = session.schedule.room_names if session.schedule else []
+        room = room_names.index(session.room) if session.room in room_names else -1
+        return day_num, session.start_time.minutes, room
+
+    def add(self, session: Session):
+        self._add(session, self._sort_key(session))
+
+    def _add(self, session: Session, sort_key: tuple):
+        self._order[id(session)] = sort_key
+        self._sessions[id(session)] = session
+        for kind, index in self._indexes.items():
+            for value in self._values(session, kind):
+                index.setdefault(value, {})[id(session)] = session
+
+    def remove(self, session: Session):
+        """
+        Removes a session. This must be called before the session's data is changed
+        """
+        if self._sessions.pop(id(session), None) is None:
+            return
+        del self._order[id(session)]
+        for kind, index in self._indexes.items():
+            for value in self._values(session, kind):
+                if sessions := index.get(value):
+                    sessions.pop(id(session), None)
+                    if not sessions:
+                        del index[value]
+
+    def _sorted(self, sessions: Iterable[Session]) -> list[Session]:
+        return sorted(sessions, key=lambda session: self._order[id(session)])
+
+    def sessions_for(self, kind: str, value) -> list[Session]:
+        return self._sorted(self._indexes[kind].get(value, {}).values())
+
+    def values(self, kind: str) -> list:
+        """
+        All the values indexed for a kind (e.g. every tag in use)
+        """
+        return list(self._indexes[kind])
+
+    def by_speaker(self, speaker_id) -> list[Session]:
+        return self.sessions_for("speaker", speaker_id)
+
+    def by_tag(self, tag: str) -> list[Session]:
+        return self.sessions_for("tag", tag)
+
+    def by_track(self, track: str) -> list[Session]:
+        return self.sessions_for("track", track)
+
+    def by_room(self, room: str) -> list[Session]:
+        return self.sessions_for("room", room)
+
+    def by_audience(self, audience: str) -> list[Session]:
+        return self.sessions_for("audience", audience)
+
+    def query(self, speaker=None, tag: str | None = None, track: str | None = None, room: str | None = None, audience: str | None = None) -> list[Session]:
+        """
+        Returns the sessions matching all the given criteria (those that are not None)
+        """
+        criteria = [(kind, value) for kind, value in zip(self.kinds, (speaker, tag, track, room, audience)) if value is not None]
+        if not criteria:
+            return self._sorted(self._sessions.values())
+        matches = sorted((self._indexes[kind].get(value, {}) for kind, value in criteria), key=len)
+        # Intersect, starting from the smallest set
+        result = matches[0]
+        for sessions in matches[1:]:
+            result = {key: session for key, session in result.items() if key in sessions}
+        return self._sorted(result.values())
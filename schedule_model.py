@@ -1,65 +1,144 @@
 import datetime
 import os
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from functools import cached_property
 from typing import Any
 
 from .logging import log_warn
-from pykyll.html import slugify, make_description
-from pykyll.markdown import render_markdown
-from pykyll.utils import common_suffix
 from sessionmodel import Session as SessionModel
+from sessionmodel.render_cache import render_markdown_cached
+from sessionmodel.slug_registry import slugify_cached
+
+# pykyll.utils' common_suffix, imported on first use
+_common_suffix = None
 
 class Time:
-    def __init__(self, time_str: str):
+    """
+    A time of day, held as minutes since midnight.
+    Times are immutable and interned, so every Time("09:00") is the same object
+    """
+    __slots__ = ("minutes",)
+
+    _by_minutes = {}  # minutes -> Time
+    _by_string = {}  # time string -> Time
+
+    def __new__(cls, time_str: str):
+        if (time := cls._by_string.get(time_str)) is not None:
+            return time
         parts = time_str.split(":")
         if len(parts) != 2:
             raise Exception(f"Invalid time: `{time_str}`")
-        self.hour = int(parts[0])
-        self.min = int(parts[1])
+        time = cls.from_minutes(int(parts[0]) * 60 + int(parts[1]))
+        cls._by_string[time_str] = time
+        return time
+
+    @classmethod
+    def from_minutes(cls, minutes: int) -> "Time":
+        if (time := cls._by_minutes.get(minutes)) is None:
+            time = object.__new__(cls)
+            object.__setattr__(time, "minutes", minutes)
+            time = cls._by_minutes.setdefault(minutes, time)
+        return time
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Time is immutable")
+
+    def __reduce__(self):
+        return Time, (str(self),)
+
+    @property
+    def hour(self) -> int:
+        return self.minutes // 60
+
+    @property
+    def min(self) -> int:
+        return self.minutes % 60
 
     @property
     def as_key(self):
         return f"{self.hour}_{self.min}"
 
     @property
-    def total_minutes(self):
-        return self.min * 60 + self.hour
+    def total_minutes(self) -> int:
+        return self.minutes
+
+    def minutes_until(self, other: "Time") -> int:
+        return other.minutes - self.minutes
+
+    def add_minutes(self, minutes: int) -> "Time":
+        return Time.from_minutes(self.minutes + minutes)
+
+    def __add__(self, minutes: int) -> "Time":
+        return self.add_minutes(minutes)
+
+    def __sub__(self, other: "Time") -> int:
+        """
+        The number of minutes between two times
+        """
+        return self.minutes - other.minutes
 
     def __str__(self):
         return f"{self.hour:02d}:{self.min:02d}"
 
     def __repr__(self):
-        return f"{self.hour:02d}:{self.min:02d}"
+        return str(self)
 
     def __lt__(self, other):
-        return (self.hour < other.hour or
-                (self.hour == other.hour) and self.min < other.min)
+        return self.minutes < other.minutes
 
     def __le__(self, other):
-        return self.hour < other.hour or (self.hour == other.hour and self.min <= other.min)
+        return self.minutes <= other.minutes
+
+    def __gt__(self, other):
+        return self.minutes > other.minutes
 
     def __ge__(self, other):
-        return self.hour > other.hour or (self.hour == other.hour and self.min >= other.min)
+        return self.minutes >= other.minutes
 
     def __eq__(self, other):
-        return  self.hour == other.hour and self.min == other.min
+        if self is other:
+            return True
+        if not isinstance(other, Time):
+            return NotImplemented
+        return self.minutes == other.minutes
 
     def __hash__(self):
-        return self.__str__().__hash__()
+        return hash(self.minutes)
 
 
 class Speaker:
+    """
+    Wraps a speaker's data. The schedule has one of these per speaker, shared by all their sessions.
+    Attributes of the data (name, bio, links etc.) can be read and set directly on the wrapper
+    """
+    __slots__ = ("data", "_bio_html")
 
     def __init__(self, data: SessionModel.Speaker):
         self.data = data
+        self._bio_html = None  # (bio, html) - so it is re-rendered if the data is replaced
+
+    def __getattr__(self, name):
+        # Only called for attributes the wrapper itself doesn't have
+        if name.startswith("_") or name == "data":
+            raise AttributeError(name)
+        return getattr(self.data, name)
+
+    def __setattr__(self, name, value):
+        if name in Speaker.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.data, name, value)
 
     @property
     def bio_as_html(self):
-        return render_markdown(self.data.bio, clean=True, strip_outer_p_tag=True, linkify=True)
+        bio = self.data.bio
+        if self._bio_html is None or self._bio_html[0] is not bio:
+            self._bio_html = (bio, render_markdown_cached(bio, clean=True, strip_outer_p_tag=True, linkify=True))
+        return self._bio_html[1]
 
 
-@dataclass()
+@dataclass(slots=True)
 class Session:
     id: str
     live: bool
@@ -69,8 +148,8 @@ class Session:
     end_time: Time
 
     # Indices into Timeslot times
-    start_time_index = 0
-    end_time_index = -1
+    start_time_index: int = 0
+    end_time_index: int = -1
 
     day: list = field(default_factory=list)  # Set after init
     room: str = "" # Set after init
@@ -80,6 +159,9 @@ class Session:
 
     schedule: Any = None
 
+    # Speakers, from schedule.speakers_by_id - filled in on first use
+    _speakers: tuple | None = field(default=None, init=False, repr=False, compare=False)
+
     @property
     def is_workshop(self) -> bool:
         return self.data.is_workshop
@@ -138,7 +220,7 @@ class Session:
     @property
     def slug(self):
         if not self._slug:
-            self._slug = slugify(self.data.title)
+            self._slug = slugify_cached(self.data.title)
         return self._slug
 
     @property
@@ -154,8 +236,22 @@ class Session:
         return self.data.short_abstract_as_html
 
     @property
-    def speakers(self):
-        return [Speaker(s) for s in self.data.speakers]
+    def speakers(self) -> tuple[Speaker, ...]:
+        if self._speakers is None:
+            if self.schedule is None:
+                # Not linked into a schedule yet, so there are no shared speakers to use
+                return tuple(Speaker(s) for s in self.data.speakers)
+            speakers_by_id = self.schedule.speakers_by_id
+            self._speakers = tuple(
+                speaker if (speaker := speakers_by_id.get(s.id)) is not None else Speaker(s)
+                for s in self.data.speakers)
+        return self._speakers
+
+    def reset_speakers(self):
+        """
+        Call after changing the session's data, or its speakers
+        """
+        self._speakers = None
 
     @property
     def speaker_image(self):
@@ -187,11 +283,14 @@ class Session:
         if self.single_day:
             return f"{self.day[0].day}, {self.day[0].date_str}"
         elif len(self.day) > 1:
+            global _common_suffix
+            if _common_suffix is None:
+                from pykyll.utils import common_suffix as _common_suffix
             date1 = self.day[0].date_str
             date2 = self.day[-1].date_str
             date1_parts = date1.split(" ")
             date2_parts = date2.split(" ")
-            suffix = common_suffix(date1_parts, date2_parts)
+            suffix = _common_suffix(date1_parts, date2_parts)
             distinct_len = len(date1_parts) - len(suffix)
             date1 = " ".join(date1_parts[:distinct_len])
             date2 = " ".join(date2_parts[:distinct_len])
@@ -213,38 +312,114 @@ class Session:
 
 
 # A timeslot for a room - usually  just one session, but may be multiple
-@dataclass
+@dataclass(slots=True)
 class SessionSlot:
     index: int
     sessions: list[Session]
     times: list[Time]
     start_time_index: int = 0
     end_time_index: int = 1
+    # (start, end) of each of the sessions in this slot. A multi session's own start_time and end_time
+    # run from its first slot to its last, so don't say when it is on in any one of them
+    session_times: list[tuple[Time, Time]] = field(default_factory=list)
 
     @property
     def is_single(self):
         return len(self.sessions) == 1
 
-@dataclass
+    def times_of(self, session: Session) -> tuple[Time, Time]:
+        for slot_session, times in zip(self.sessions, self.session_times):
+            if slot_session is session:
+                return times
+        return session.start_time, session.end_time
+
+@dataclass(slots=True)
 class Timeslot:
     times: list[Time]
     type: str
     session_slots: list[SessionSlot]
+    _has_speakers: bool | None = field(default=None, init=False, repr=False, compare=False)
 
-    @cached_property
+    @property
     def has_speakers(self):
-        for r in self.session_slots:
-            for s in r.session_slots:
-                if s.data.speakers:
-                    return True
-        return False
+        if self._has_speakers is None:
+            self._has_speakers = any(s.data.speakers for r in self.session_slots for s in r.sessions)
+        return self._has_speakers
 
     @property
     def is_trackless(self):
         return len(self.session_slots) == 1
 
 
-@dataclass
+class RoomGrid:
+    """
+    The sessions on a day laid out as a rooms x times grid.
+    Each row is a room (in the order of Day.rooms) and each column the interval starting at
+    one of the day's sorted time boundaries. Cells hold an index into `sessions` (or -1 if empty)
+    """
+    def __init__(self, rooms: list[int], timeslots: list[Timeslot]):
+        self.rooms = rooms
+        self.times = sorted({time for timeslot in timeslots for time in timeslot.times})
+        self.sessions = []
+        self._rows = {room: row for row, room in enumerate(rooms)}
+        self._time_indices = {time: index for index, time in enumerate(self.times)}
+        self._cells = array("i", [-1]) * (len(rooms) * len(self.times))
+
+        session_indices = {}
+        column_count = len(self.times)
+        for timeslot in timeslots:
+            first = self._time_indices[timeslot.times[0]]
+            last = self._time_indices[timeslot.times[-1]]
+            for session_slot in timeslot.session_slots:
+                # A lone session (e.g. a keynote or break) spans every room
+                rows = range(len(rooms)) if timeslot.is_trackless else (session_slot.index,)
+                for session in session_slot.sessions:
+                    if (session_index := session_indices.get(id(session))) is None:
+                        session_index = session_indices[id(session)] = len(self.sessions)
+                        self.sessions.append(session)
+                    # Not session.start_time/end_time, which for a multi session run from its first slot to its last
+                    session_start, session_end = session_slot.times_of(session)
+                    start = max(first, self.time_index(session_start))
+                    end = min(last, self.time_index(session_end))
+                    for row in rows:
+                        offset = row * column_count
+                        self._cells[offset + start:offset + end] = array("i", [session_index]) * (end - start)
+
+    def time_index(self, time: Time) -> int:
+        """
+        The index of the last time boundary at or before time (-1 if it is before the first)
+        """
+        if (index := self._time_indices.get(time)) is not None:
+            return index
+        return bisect_right(self.times, time) - 1
+
+    def session_at(self, room: int, time: Time) -> Session | None:
+        """
+        The session in the given room (an entry of Day.rooms) at the given time, if any
+        """
+        row = self._rows.get(room)
+        column = self.time_index(time)
+        if row is None or column < 0:
+            return None
+        session_index = self._cells[row * len(self.times) + column]
+        return self.sessions[session_index] if session_index >= 0 else None
+
+    def sessions_in_room(self, room: int) -> list[Session]:
+        """
+        The sessions in the given room (an entry of Day.rooms), in time order
+        """
+        if (row := self._rows.get(room)) is None:
+            return []
+        sessions = []
+        previous = -1
+        for session_index in self._cells[row * len(self.times):(row + 1) * len(self.times)]:
+            if session_index != previous and session_index >= 0:
+                sessions.append(self.sessions[session_index])
+            previous = session_index
+        return sessions
+
+
+@dataclass(slots=True)
 class Day:
     rooms: list[int]
 
@@ -259,6 +434,7 @@ class Day:
     label: str
     alt_label: str
     timeslots: list[Timeslot]
+    grid: RoomGrid | None = None
 
 
 @dataclass
@@ -277,8 +453,10 @@ class Schedule:
     tracks: dict
     sessions_by_slug: dict[str, Session]
     all_sessions_by_id: dict[str, Session]
-    speakers_by_id: dict[str, Speaker]
+    speakers_by_id: dict[str, Speaker]  # Speaker wrappers, which read and write through to the speaker data
     workshop_groups: list[WorkshopGroup] = field(default_factory=list)
+    index: Any = None  # ScheduleIndex - set after init
+    search_index: Any = None  # SearchIndex - set after init
 
     @property
     def all_speakers(self) -> list[Speaker]:
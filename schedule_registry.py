@@ -0,0 +1,89 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from sessionmodel.schedule_model import Schedule
+from sessionmodel.slug_registry import SlugRegistry
+
+
+class ScheduleRegistry:
+    """
+    Thread-safe store of loaded schedules, by year.
+    Loads can be marked as in flight, in which case anyone asking for a year that has not been
+    published yet waits for the load to finish, rather than seeing nothing.
+    Once a year has been published, readers always get the latest published schedule immediately
+    (so a reload never blocks them).
+    The slugs of every published schedule are indexed in slugs
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._schedules = {}
+        self._loading = {}  # year -> number of loads in flight
+        self.slugs = SlugRegistry()
+
+    def publish(self, schedule: Schedule):
+        self.slugs.add_schedule(schedule)
+        with self._condition:
+            self._schedules[str(schedule.year)] = schedule
+            self._condition.notify_all()
+
+    def get(self, year, timeout: float | None = None) -> Schedule | None:
+        """
+        Returns the schedule for the year, waiting for any in-flight load if none has been published yet
+        """
+        key = str(year)
+        with self._condition:
+            self._condition.wait_for(lambda: key in self._schedules or key not in self._loading, timeout)
+            return self._schedules.get(key)
+
+    def _start_loading(self, key: str):
+        self._loading[key] = self._loading.get(key, 0) + 1
+
+    def _finish_loading(self, key: str):
+        with self._condition:
+            if (count := self._loading[key] - 1) > 0:
+                self._loading[key] = count
+            else:
+                del self._loading[key]
+            self._condition.notify_all()
+
+    @contextmanager
+    def loading(self, year):
+        """
+        Marks a load of the year as in flight for the duration of the with block
+        """
+        key = str(year)
+        with self._condition:
+            self._start_loading(key)
+        try:
+            yield
+        finally:
+            self._finish_loading(key)
+
+    def load_once(self, year, load: Callable[[], Schedule]) -> Schedule:
+        """
+        Returns the schedule for the year, calling load to load it if it has not already been loaded,
+        or waiting for it if it is being loaded by someone else
+        """
+        key = str(year)
+        with self._condition:
+            self._condition.wait_for(lambda: key in self._schedules or key not in self._loading)
+            if schedule := self._schedules.get(key):
+                return schedule
+            self._start_loading(key)
+        try:
+            schedule = load()
+            self.publish(schedule)
+            return schedule
+        finally:
+            self._finish_loading(key)
+
+    @property
+    def years(self) -> list[str]:
+        with self._condition:
+            return list(self._schedules)
+
+    def clear(self):
+        with self._condition:
+            self._schedules.clear()
+            self.slugs.clear()
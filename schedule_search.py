@@ -0,0 +1,145 @@
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sessionmodel.schedule_model import Schedule, Session
+
+_token_pattern = re.compile(r"\w+")
+
+# How much a match in each field counts towards a result's score
+FIELD_WEIGHTS = {
+    "title": 8,
+    "tags": 6,
+    "name": 6,
+    "abstract": 2,
+    "outline": 1,
+    "bio": 1,
+}
+
+
+def tokenise(text: str | None) -> list[str]:
+    return _token_pattern.findall(text.lower()) if text else []
+
+
+@dataclass
+class SearchResult:
+    kind: str  # "session" or "speaker"
+    key: str  # session slug or speaker id
+    year: int
+    score: float
+    item: Any  # schedule_model.Session or schedule_model.Speaker
+
+
+class SearchIndex:
+    """
+    An inverted index over the sessions (title, abstract, outline, tags and speaker names)
+    and speakers (name and bio) of a schedule, with prefix matching and ranked results.
+    Sessions are keyed by slug, speakers by id
+    """
+    def __init__(self, schedule: Schedule | None = None):
+        self.year = None
+        self._postings = {}  # token -> {(kind, key): weight}
+        self._document_tokens = {}  # (kind, key) -> set of tokens
+        self._items = {}  # (kind, key) -> indexed object
+        self._sorted_tokens = None  # built on demand, for prefix lookups
+        if schedule is not None:
+            self.year = schedule.year
+            for session in schedule.sessions_by_slug.values():
+                self.add_session(session)
+            for speaker in schedule.speakers_by_id.values():
+                self.add_speaker(speaker)
+
+    def _add(self, document: tuple, item, fields: Iterable[tuple[str, str | None]]):
+        self._remove(document)
+        weights = {}
+        for field, text in fields:
+            for token in set(tokenise(text)):
+                weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                self._sorted_tokens = None
+            self._postings[token][document] = weight
+        self._document_tokens[document] = set(weights)
+        self._items[document] = item
+
+    def _remove(self, document: tuple):
+        for token in self._document_tokens.pop(document, ()):
+            postings = self._postings[token]
+            del postings[document]
+            if not postings:
+                del self._postings[token]
+                self._sorted_tokens = None
+        self._items.pop(document, None)
+
+    def add_session(self, session: Session):
+        data = session.data
+        self._add(("session", session.slug), session, [
+            ("title", data.title),
+            ("abstract", data.abstract),
+            ("outline", data.outline),
+            ("tags", " ".join(data.tags or [])),
+            ("name", " ".join(speaker.name for speaker in data.speakers))])
+
+    def remove_session(self, session: Session):
+        self._remove(("session", session.slug))
+
+    def add_speaker(self, speaker):
+        self._add(("speaker", speaker.id), speaker, [
+            ("name", speaker.name),
+            ("bio", speaker.bio)])
+
+    def remove_speaker(self, speaker_id):
+        self._remove(("speaker", speaker_id))
+
+    def _matching_tokens(self, term: str) -> list[str]:
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = []
+        index = bisect_left(self._sorted_tokens, term)
+        while index < len(self._sorted_tokens) and self._sorted_tokens[index].startswith(term):
+            tokens.append(self._sorted_tokens[index])
+            index += 1
+        return tokens
+
+    def search(self, query: str, limit: int | None = 20, prefix: bool = True) -> list[SearchResult]:
+        """
+        Returns the sessions and speakers matching every word in the query, best matches first.
+        With prefix matching, a word also matches any longer word it is the start of
+        """
+        scores = None
+        for term in set(tokenise(query)):
+            tokens = self._matching_tokens(term) if prefix else [term] if term in self._postings else []
+            term_scores = {}
+            for token in tokens:
+                # An exact match counts for more than a prefix match
+                factor = 1.0 if token == term else 0.5
+                for document, weight in self._postings[token].items():
+                    term_scores[document] = max(term_scores.get(document, 0), weight * factor)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {document: score + term_scores[document] for document, score in scores.items() if document in term_scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+
+        # Ties are broken by kind and key, so results don't depend on the order things were indexed
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0][0], str(item[0][1])))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [SearchResult(kind, key, self.year, score, self._items[(kind, key)]) for (kind, key), score in ranked]
+
+
+def search_schedules(schedules: Iterable[Schedule], query: str, limit: int | None = 20, prefix: bool = True) -> list[SearchResult]:
+    """
+    Searches several schedules (e.g. every loaded year) and merges the results
+    """
+    results = []
+    for schedule in schedules:
+        if schedule.search_index is not None:
+            results.extend(schedule.search_index.search(query, limit, prefix))
+    results.sort(key=lambda result: -result.score)
+    return results[:limit] if limit is not None else results
@@ -0,0 +1,77 @@
+from dataclasses import fields, is_dataclass
+from typing import Iterable
+
+_scalar_types = (str, int, float, bool, type(None))
+
+# Dataclass type -> names of its fields that are serialized (i.e. not _ prefixed)
+_field_names = {}
+
+
+def _serialized_field_names(cls) -> tuple[str, ...] | None:
+    if (names := _field_names.get(cls)) is None:
+        if not is_dataclass(cls):
+            return None
+        names = _field_names[cls] = tuple(f.name for f in fields(cls) if not f.name.startswith("_"))
+    return names
+
+
+def to_data(value):
+    """
+    Converts a model object (Session, Speaker, Link, Colour, or any other dataclass), recursively,
+    into plain dicts and lists for serializing. Fields that are None or _ prefixed are left out.
+    This gives the same result as dataclasses.asdict with a filtering dict_factory, but reads the
+    fields directly rather than deep-copying everything first
+    """
+    if type(value) in _scalar_types:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_data(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_data(item) for key, item in value.items()}
+    if (names := _serialized_field_names(type(value))) is None:
+        return value
+    data = {}
+    for name in names:
+        if (item := getattr(value, name)) is not None:
+            data[name] = item if type(item) in _scalar_types else to_data(item)
+    return data
+
+
+def format_json(items: Iterable, indent: int | None = None) -> str:
+    """
+    Formats model objects as a JSON array
+    """
+    import json  # only needed when writing JSON, so not imported up front
+    return json.dumps([to_data(item) for item in items], ensure_ascii=False, indent=indent)
+
+
+def write_json(filename: str, items: Iterable, indent: int | None = None):
+    """
+    Writes model objects to a JSON file as UTF-8, converting and writing one item at a time
+    """
+    import json
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("[")
+        separator = "\n"
+        for item in items:
+            f.write(separator)
+            f.write(json.dumps(to_data(item), ensure_ascii=False, indent=indent))
+            separator = ",\n"
+        f.write("\n]\n")
+
+
+def format_msgpack(items: Iterable) -> bytes:
+    """
+    Formats model objects as a MessagePack array. Needs the msgpack package
+    """
+    try:
+        import msgpack
+    except ImportError:
+        raise Exception("MessagePack output needs the msgpack package (pip install msgpack)")
+    return msgpack.packb([to_data(item) for item in items], use_bin_type=True)
+
+
+def write_msgpack(filename: str, items: Iterable):
+    content = format_msgpack(items)
+    with open(filename, "wb") as f:
+        f.write(content)
@@ -0,0 +1,156 @@
+import copy
+from collections.abc import Mapping
+
+from pykyll.utils import dict_merge
+from sessionmodel.instrumentation import timed
+from sessionmodel.Sessions import load_yaml
+
+
+def get_speakers_as_dict(session: dict) -> {str: dict}:
+    if speakers := session.get("speakers"):
+        return {speaker["id"]: speaker for speaker in speakers}
+    else:
+        return {}
+
+
+def merge_session_data(existing_session: dict, session: dict) -> dict:
+    """
+    Merges a later layer of data for a session over an earlier one. Speakers are merged by id
+    """
+    existing_speakers = get_speakers_as_dict(existing_session)
+    new_speakers = get_speakers_as_dict(session)
+    speakers = dict_merge(existing_speakers, new_speakers)
+    session = dict_merge(existing_session, session)
+    if speakers:
+        session["speakers"] = [s for s in speakers.values()]
+    return session
+
+
+@timed("merge_layers")
+def merge_session_layers(layers: [[dict]]) -> {str: dict}:
+    """
+    Merges lists of session data dicts, in order, into a dict of session data by id
+    """
+    all_session_data = {}
+    for session_data in layers:
+        for session in session_data:
+            if (session_id := session.get("id")) is None:
+                raise Exception(f"session data has no ID:\n{session}")
+            if existing_session := all_session_data.get(session_id):
+                session = merge_session_data(existing_session, session)
+            all_session_data[session_id] = session
+    return all_session_data
+
+
+class SessionLayers(Mapping):
+    """
+    Layers of session data (e.g. the contents of fixed_session_data.yml, session_data.yml and
+    session_data_overrides.yml), kept separately and merged per session, on demand, as by
+    merge_session_layers. It maps session id to the merged data, which is cached until a layer
+    holding that session is replaced - treat it as read-only (copy it to modify or parse it).
+    Each layer has a name (the path, for files), and provenance reports which layer each
+    field's value came from
+    """
+    def __init__(self, layers: Mapping[str, list[dict]] | None = None):
+        self._layers = {}  # name -> {session id: session data}
+        self._merged = {}  # session id -> merged session data
+        self._ids = None  # all session ids, in merge order - built on demand
+        for name, sessions_data in (layers or {}).items():
+            self.replace_layer(name, sessions_data)
+
+    @classmethod
+    def from_files(cls, paths: [str]) -> "SessionLayers":
+        return cls({path: load_yaml(path) or [] for path in paths})
+
+    @property
+    def layer_names(self) -> list[str]:
+        return list(self._layers)
+
+    def layer(self, name: str) -> {str: dict}:
+        return self._layers[name]
+
+    def replace_layer(self, name: str, sessions_data: [dict]) -> set[str]:
+        """
+        Replaces (or, for a new name, adds as the last layer) a layer's session data, without re-merging
+        anything else. Returns the ids of the sessions whose data in that layer changed
+        """
+        new_layer = merge_session_layers([sessions_data])
+        old_layer = self._layers.get(name, {})
+        changed = {
+            session_id for session_id in old_layer.keys() | new_layer.keys()
+            if old_layer.get(session_id) != new_layer.get(session_id)}
+        self._layers[name] = new_layer
+        for session_id in changed:
+            self._merged.pop(session_id, None)
+        if new_layer.keys() != old_layer.keys():
+            self._ids = None
+        return changed
+
+    def _session_ids(self) -> list[str]:
+        if self._ids is None:
+            self._ids = list(dict.fromkeys(session_id for layer in self._layers.values() for session_id in layer))
+        return self._ids
+
+    def reload(self, path: str) -> set[str]:
+        """
+        Re-reads a file layer. Returns the ids of the sessions whose data in that file changed
+        """
+        return self.replace_layer(path, load_yaml(path) or [])
+
+    def __getitem__(self, session_id: str) -> dict:
+        if (merged := self._merged.get(session_id)) is None:
+            for layer in self._layers.values():
+                if (session_data := layer.get(session_id)) is not None:
+                    # Copied, so nothing merged in can share structure with the layers
+                    session_data = copy.deepcopy(session_data)
+                    merged = session_data if merged is None else merge_session_data(merged, session_data)
+            if merged is None:
+                raise KeyError(session_id)
+            self._merged[session_id] = merged
+        return merged
+
+    def __iter__(self):
+        return iter(self._session_ids())
+
+    def __len__(self) -> int:
+        return len(self._session_ids())
+
+    def __contains__(self, session_id) -> bool:
+        return any(session_id in layer for layer in self._layers.values())
+
+    def merged_copy(self, session_id: str) -> dict | None:
+        """
+        A copy of the merged data for a session, that can be modified (e.g. by parse_session), or None
+        """
+        return copy.deepcopy(self[session_id]) if session_id in self else None
+
+    def provenance(self, session_id: str) -> dict:
+        """
+        The name of the layer each field of a session's merged data came from, e.g.
+            {"id": "fixed_session_data.yml", "title": "session_data_overrides.yml", ...,
+             "speakers": {42: {"name": "session_data.yml", "bio": "session_data_overrides.yml"}}}
+        """
+        if session_id not in self:
+            raise KeyError(session_id)
+        provenance = {}
+        speakers = {}
+        for name, layer in self._layers.items():
+            if (session_data := layer.get(session_id)) is None:
+                continue
+            for field, value in session_data.items():
+                if field == "speakers":
+                    for speaker in value or []:
+                        speakers.setdefault(speaker["id"], {}).update((speaker_field, name) for speaker_field in speaker)
+                    provenance["speakers"] = speakers
+                else:
+                    provenance[field] = name
+        return provenance
+
+    def source_of(self, session_id: str, field: str, speaker_id=None) -> str | None:
+        """
+        The name of the layer a session's field (or, given speaker_id, one of its speaker's fields) came from
+        """
+        provenance = self.provenance(session_id)
+        if speaker_id is not None:
+            return provenance.get("speakers", {}).get(speaker_id, {}).get(field)
+        return provenance.get(field)
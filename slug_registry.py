@@ -0,0 +1,112 @@
+import threading
+from functools import lru_cache
+from typing import Any
+
+from sessionmodel.logging import log_warn
+
+# pykyll.html's slugify, imported on first use
+_slugify = None
+
+
+@lru_cache(maxsize=65536)
+def slugify_cached(text: str) -> str:
+    """
+    pykyll.html.slugify, memoized - the same titles are slugified many times over (and across years)
+    """
+    global _slugify
+    if _slugify is None:
+        from pykyll.html import slugify as _slugify
+    return _slugify(text)
+
+
+class SlugRegistry:
+    """
+    Every session slug of every published schedule, for resolving a slug (e.g. from an old URL) to the
+    year and session without scanning each year's sessions_by_slug. Numbered slugs of reusable sessions
+    (e.g. lunch-2) are included, and the base slug (lunch) resolves to the first of them.
+    Non-reusable slugs that are used by different sessions in different years are reported as collisions
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._years = {}  # year -> {slug: session}
+        self._index = {}  # slug -> {year: session}
+        self.collisions = {}  # slug -> [years], for slugs of different (non-reusable) sessions in several years
+
+    @staticmethod
+    def _slugs(schedule) -> dict:
+        slugs = {}
+        for slug, session in schedule.sessions_by_slug.items():
+            slugs[slug] = session
+            if session.data.reusable:
+                slugs.setdefault(slugify_cached(session.data.title), session)
+        return slugs
+
+    def add_schedule(self, schedule):
+        """
+        Adds (or, if its year was already added, replaces) the slugs of a schedule
+        """
+        year = str(schedule.year)
+        slugs = self._slugs(schedule)
+        with self._lock:
+            reported = dict(self.collisions)  # so replacing a year doesn't report the same collisions again
+            for slug in self._years.get(year, {}):
+                self._remove(slug, year)
+            self._years[year] = slugs
+            for slug, session in slugs.items():
+                by_year = self._index.setdefault(slug, {})
+                by_year[year] = session
+                if len(by_year) > 1 and not session.data.reusable:
+                    if years := self._colliding_years(by_year):
+                        if years != reported.get(slug):
+                            log_warn("Slug '%s' is used by different sessions in %s", slug, ", ".join(years))
+                        self.collisions[slug] = years
+
+    def _remove(self, slug: str, year: str):
+        by_year = self._index[slug]
+        del by_year[year]
+        if not by_year:
+            del self._index[slug]
+        if slug in self.collisions:
+            if years := self._colliding_years(by_year):
+                self.collisions[slug] = years
+            else:
+                del self.collisions[slug]
+
+    @staticmethod
+    def _colliding_years(by_year: dict) -> list[str]:
+        # The same session (by data id) carried over to another year is not a collision
+        years = sorted(year for year, session in by_year.items() if not session.data.reusable)
+        return years if len({by_year[year].id for year in years}) > 1 else []
+
+    def remove_year(self, year):
+        year = str(year)
+        with self._lock:
+            for slug in self._years.pop(year, {}):
+                self._remove(slug, year)
+
+    def resolve(self, slug: str, year=None) -> tuple[str, Any] | None:
+        """
+        Returns (year, session) for the slug - in the given year, or else the latest year that has it - or None
+        """
+        if (by_year := self._index.get(slug)) is None:
+            return None
+        if year is not None:
+            year = str(year)
+            return (year, session) if (session := by_year.get(year)) is not None else None
+        # A snapshot, in case the schedule for a year is being replaced at the same time
+        return max(list(by_year.items()), key=lambda item: item[0], default=None)
+
+    def years_for(self, slug: str) -> list[str]:
+        return sorted(self._index.get(slug, {}))
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def clear(self):
+        with self._lock:
+            self._years.clear()
+            self._index.clear()
+            self.collisions.clear()
@@ -0,0 +1,65 @@
+import pytest
+
+from sessionmodel.incremental_schedule import IncrementalScheduleLoader
+from sessionmodel.schedule_builder import load_schedule
+
+SCHEDULE = """\
+year: 2025
+room_names: [Main, Room B]
+days:
+- date: "2025-06-03"
+  day_num: 0
+  day: Tuesday
+  rooms: [0, 1]
+  timeslots:
+  - time: ["09:30", "10:30"]
+    sessions: [s1, s2]
+"""
+
+SESSION_DATA = """\
+- id: s1
+  title: Talk One
+  abstract: First
+  length: "60"
+  audience: [beginner]
+  tags: [python]
+  outline: null
+  speakers:
+  - id: 1
+    name: Alice Smith
+- id: s2
+  title: Talk Two
+  abstract: Second
+  length: "60"
+  audience: [beginner]
+  tags: [rust]
+  outline: null
+  speakers:
+  - id: 2
+    name: Bob Jones
+"""
+
+
+def _state(schedule):
+    return (list(schedule.sessions_by_slug),
+            {tag: [session.slug for session in schedule.index.sessions_for("tag", tag)] for tag in schedule.index.values("tag")},
+            {session_id: session.title for session_id, session in schedule.all_sessions_by_id.items()})
+
+
+def test_slug_collision_leaves_schedule_unchanged_and_change_is_retried(tmp_path):
+    schedule_path = tmp_path / "schedule.yml"
+    session_data_path = tmp_path / "session_data.yml"
+    schedule_path.write_text(SCHEDULE)
+    session_data_path.write_text(SESSION_DATA)
+    loader = IncrementalScheduleLoader(str(schedule_path), [str(session_data_path)])
+    before = _state(loader.load())
+
+    session_data_path.write_text(SESSION_DATA.replace("title: Talk One", "title: Talk Two"))
+    with pytest.raises(Exception, match="same slug"):
+        loader.update([str(session_data_path)])
+    assert _state(loader.schedule) == before
+
+    session_data_path.write_text(SESSION_DATA.replace("title: Talk One", "title: Talk One Fixed"))
+    changes = loader.update([str(session_data_path)])
+    assert changes.added_slugs == {"talk-one-fixed"} and changes.removed_slugs == {"talk-one"}
+    assert _state(loader.schedule) == _state(load_schedule(str(schedule_path), [str(session_data_path)]))
@@ -0,0 +1,57 @@
+from sessionmodel.schedule_builder import load_schedule
+from sessionmodel.schedule_model import Time
+
+SCHEDULE = """\
+year: 2030
+room_names: [Main, Room B]
+days:
+- date: "2030-06-01"
+  day_num: 0
+  day: Saturday
+  rooms: [0, 1]
+  timeslots:
+  - time: ["09:00", "11:00"]
+    sessions:
+    - session_slot:
+      - session: talk
+        time: ["10:00", "11:00"]
+      - session: workshop
+        time: ["09:00", "10:00"]
+    - other
+  - time: ["11:30", "12:30"]
+    sessions: [workshop, other2]
+"""
+
+
+def _session(session_id: str, title: str, multi: bool = False) -> str:
+    return f"""\
+- id: {session_id}
+  title: {title}
+  abstract: About it
+  length: "60"
+  audience: []
+  tags: []
+  outline: null
+  multi: {str(multi).lower()}
+  speakers: []
+"""
+
+
+def test_room_grid_places_multi_session_by_its_times_in_each_slot(tmp_path):
+    schedule_path = tmp_path / "schedule.yml"
+    session_data_path = tmp_path / "session_data.yml"
+    schedule_path.write_text(SCHEDULE)
+    session_data_path.write_text(_session("talk", "Talk") + _session("workshop", "Workshop", multi=True)
+                                 + _session("other", "Other") + _session("other2", "Other Two"))
+    schedule = load_schedule(str(schedule_path), [str(session_data_path)])
+    grid = schedule.days[0].grid
+    workshop = schedule.sessions_by_slug["workshop"]
+    talk = schedule.sessions_by_slug["talk"]
+
+    # The workshop's own times run from 09:00 to 12:30, across the talk
+    assert (workshop.start_time, workshop.end_time) == (Time("09:00"), Time("12:30"))
+    assert grid.session_at(0, Time("09:30")) is workshop
+    assert grid.session_at(0, Time("10:30")) is talk
+    assert grid.session_at(0, Time("11:15")) is None
+    assert grid.session_at(0, Time("12:00")) is workshop
+    assert grid.sessions_in_room(0) == [workshop, talk, workshop]
@@ -0,0 +1,48 @@
+import logging
+
+from sessionmodel.Sessions import iter_sessions, load_sessions
+
+SESSION_DATA = """\
+- id: s1
+  title: Talk One
+  abstract: First
+  length: "60"
+  audience: []
+  tags: []
+  outline: null
+  speakers:
+  - id: 1
+    name: Alice Smith
+- id: s2
+  title: Talk Two
+  abstract: Second
+  length: "60"
+  audience: []
+  tags: []
+  outline: null
+  speakers:
+  - id: 2
+    name: Bob Jones
+"""
+
+
+def _warnings(caplog) -> list[str]:
+    messages = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    caplog.clear()
+    return messages
+
+
+def test_suspended_iter_sessions_does_not_swallow_other_warnings(tmp_path, caplog):
+    path = tmp_path / "session_data.yml"
+    path.write_text(SESSION_DATA)
+    caplog.set_level(logging.WARNING, logger="sessionmodel")
+
+    sessions = iter_sessions(str(path))
+    assert next(sessions).id == "s1"
+    assert _warnings(caplog) == []
+
+    load_sessions(str(path))
+    assert _warnings(caplog) == ["2 speakers without bio - defaulted (Alice Smith, Bob Jones)"]
+
+    assert [session.id for session in sessions] == ["s2"]
+    assert _warnings(caplog) == ["2 speakers without bio - defaulted (Alice Smith, Bob Jones)"]
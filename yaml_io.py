@@ -0,0 +1,92 @@
+from typing import Iterable, Iterator
+
+import yaml
+from yaml.composer import Composer
+from yaml.events import StreamEndEvent, SequenceStartEvent, SequenceEndEvent
+
+# Use the libyaml bindings when PyYAML was built with them - they parse the same
+# documents as the pure-Python implementation, but many times faster
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as FastSafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper as FastSafeDumper
+from yaml import SafeDumper
+
+
+class _StreamingLoader(SafeLoader, Composer):
+    """
+    The libyaml loader only composes whole documents, so this borrows the node-at-a-time
+    composer from the pure-Python implementation, which works from the same events
+    """
+
+
+def parse_yaml(content: bytes | str):
+    """
+    Parses YAML content (bytes are decoded as UTF-8, or per any BOM)
+    """
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def format_yaml(data, fast: bool = False) -> str:
+    """
+    Formats data as a block-style YAML string, preserving key order.
+    By default this uses the pure-Python emitter, so the output is byte-for-byte what
+    we have always written. fast=True uses libyaml (if available) - the YAML is equivalent,
+    but long quoted strings are folded differently, so files will show diffs the first time
+    """
+    dumper = FastSafeDumper if fast else SafeDumper
+    return yaml.dump(data, Dumper=dumper, default_flow_style=False, sort_keys=False)
+
+
+def read_yaml(filename: str):
+    """
+    Reads a YAML file, reading the whole file as bytes in one go
+    """
+    with open(filename, "rb") as f:
+        content = f.read()
+    return parse_yaml(content)
+
+
+def write_yaml(filename: str, data, fast: bool = False):
+    """
+    Writes data to a YAML file as UTF-8 (see format_yaml for fast)
+    """
+    content = format_yaml(data, fast).encode("utf-8")
+    with open(filename, "wb") as f:
+        f.write(content)
+
+
+def iter_yaml_sequence(filename: str) -> Iterator:
+    """
+    Reads a YAML file whose document is a sequence, yielding one item at a time.
+    The file is read incrementally, so only the item currently being parsed is held in memory
+    """
+    with open(filename, "rb") as f:
+        loader = _StreamingLoader(f)
+        loader.anchors = {}
+        try:
+            loader.get_event()  # stream start
+            if loader.check_event(StreamEndEvent):
+                return  # empty file
+            loader.get_event()  # document start
+            if not loader.check_event(SequenceStartEvent):
+                raise Exception(f"Expected a sequence in {filename}")
+            loader.get_event()
+            while not loader.check_event(SequenceEndEvent):
+                yield loader.construct_document(loader.compose_node(None, None))
+        finally:
+            loader.dispose()
+
+
+def write_yaml_sequence(filename: str, items: Iterable, fast: bool = False):
+    """
+    Writes items to a YAML file as a sequence, formatting each item as it is produced.
+    The output is the same as writing the whole list with write_yaml
+    """
+    with open(filename, "wb") as f:
+        empty = True
+        for item in items:
+            f.write(format_yaml([item], fast).encode("utf-8"))
+            empty = False
+        if empty:
+            f.write(format_yaml([], fast).encode("utf-8"))